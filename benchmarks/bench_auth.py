@@ -0,0 +1,114 @@
+"""Benchmark login and session validation for each authentication backend.
+
+Usage (depuis la racine du projet) :
+
+    python -m benchmarks.bench_auth --backends sqlite duckdb supabase --users 50 --threads 8
+
+Le backend Supabase tourne sur le substitut PostgREST local (SUPABASE_LOCAL=1),
+DuckDB sur une base temporaire. ``--iterations`` fixe le coût PBKDF2 utilisé.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+TMP_DIR = Path(tempfile.mkdtemp(prefix="bench_auth_"))
+
+# À positionner avant l'import des modules d'authentification
+os.environ["SUPABASE_LOCAL"] = "1"
+os.environ["AUTH_SQLITE_PATH"] = ":memory:"
+os.environ.setdefault("LOGIN_RATE_LIMIT", str(10**9))
+os.environ.setdefault("HASH_QUEUE_LIMIT", str(10**6))
+os.environ["HASH_PARAMS_FILE"] = str(TMP_DIR / "hash_params.json")
+
+from utils.auth import get_auth, get_authenticator  # noqa: E402
+from utils.session_cache import get_session_cache  # noqa: E402
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _run(fn, args: list, threads: int) -> dict:
+    latencies = []
+
+    def timed(arg):
+        started = time.perf_counter()
+        result = fn(arg)
+        latencies.append(time.perf_counter() - started)
+        return result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(timed, args))
+    elapsed = time.perf_counter() - started
+    return {
+        "results": results,
+        "count": len(args),
+        "throughput_per_s": round(len(args) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+    }
+
+
+def bench_backend(name: str, users: int, threads: int) -> dict:
+    if name == "duckdb":
+        get_auth(name).DB_PATH = TMP_DIR / "app.db"
+    get_auth(name).init_db()
+    auth = get_authenticator(name)
+
+    emails = [f"bench{i}@{name}.local" for i in range(users)]
+    signup = _run(lambda email: auth.create_user(email, email, "motdepasse"), emails, threads)
+
+    def login(email):
+        user = auth.authenticate_user(email, "motdepasse")
+        return auth.create_session(user["id"])
+
+    logins = _run(login, emails, threads)
+    tokens = logins.pop("results")
+
+    get_session_cache().clear()
+    cold = _run(auth.get_session, tokens, threads)
+    warm = _run(auth.get_session, tokens, threads)
+
+    report = {"signup": signup, "login": logins, "session_cold": cold, "session_cached": warm}
+    for stats in report.values():
+        stats.pop("results", None)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "duckdb", "supabase"])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=200_000, help="itérations PBKDF2")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    Path(os.environ["HASH_PARAMS_FILE"]).write_text(
+        json.dumps({"scheme": "pbkdf2-sha256", "iterations": args.iterations})
+    )
+    results = {name: bench_backend(name, args.users, args.threads) for name in args.backends}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':<10} {'opération':<15} {'n':>6} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, report in results.items():
+        for op, stats in report.items():
+            print(
+                f"{name:<10} {op:<15} {stats['count']:>6} {stats['throughput_per_s']:>10} "
+                f"{stats['p50_ms']:>10} {stats['p95_ms']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Time loading, KPIs and chart aggregations on synthetic datasets of growing size.
+
+Usage (depuis la racine du projet) :
+
+    python -m benchmarks.bench_scaling --sizes 1e5 1e6 1e7 --backends cube duckdb
+
+Les jeux de données sont générés une fois dans ``data/.bench`` (voir
+``benchmarks.generate_dataset``). Chaque exécution est enregistrée dans
+``benchmarks/results`` puis comparée à la précédente : les opérations plus
+lentes de plus de ``--threshold`` sont signalées comme régressions.
+
+Le chargement et chaque backend sont mesurés dans un processus neuf : caches
+Streamlit vides et RSS maximale (``VmHWM``) propre à la mesure.
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.generate_dataset import write_dataset
+from utils.aggregations import get_backend
+from utils.data_loader import (
+    SHARED_CACHE,
+    ensure_shared,
+    ensure_snapshot,
+    load_data,
+    memory_report,
+    shared_path,
+    snapshot_path,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data" / ".bench"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# Opérations appelées par les pages (KPIs puis graphiques)
+OPERATIONS = {
+    "total_revenue": lambda b: b.total_revenue(),
+    "average_order_value": lambda b: b.average_order_value(),
+    "top_products": lambda b: b.top_products(5),
+    "sales_by_category": lambda b: b.sales_by_category(),
+    "sales_by_category_region": lambda b: b.sales_by_category(region="Bretagne"),
+    "sales_over_time": lambda b: b.sales_over_time(),
+    "customer_counts_age": lambda b: b.customer_counts("customer_age"),
+    "customer_counts_gender": lambda b: b.customer_counts("customer_gender"),
+}
+
+
+def _peak_rss_mb() -> float:
+    # VmHWM : pic du processus lui-même (ru_maxrss hérite du pic du parent au fork)
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss est en Ko sous Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def dataset(rows: int, seed: int = 0) -> Path:
+    """Path of the synthetic CSV with ``rows`` rows, generated if missing."""
+    path = DATA_DIR / f"sales_{rows}.csv"
+    if not path.exists():
+        write_dataset(path, rows, seed)
+    return path
+
+
+def _isolated(fn, *args):
+    """Run ``fn(*args)`` in a new process and return its result."""
+    # spawn : interpréteur vierge, ru_maxrss ne reflète que cette mesure
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def _bench_load(path: str) -> dict:
+    # Snapshot Parquet et fichier Arrow partagé reconstruits à chaque mesure
+    shared_path(path).unlink(missing_ok=True)
+    snap = snapshot_path(path)
+    snap.unlink(missing_ok=True)
+    snap.with_suffix(".json").unlink(missing_ok=True)
+
+    baseline = _peak_rss_mb()
+    report = {"csv_mb": round(Path(path).stat().st_size / 2**20, 1)}
+    report["snapshot_build_ms"] = _timed(lambda: ensure_snapshot(path))
+    if SHARED_CACHE:
+        report["shared_build_ms"] = _timed(lambda: ensure_shared(path))
+    report["load_ms"] = _timed(lambda: load_data(path))
+    report["frame_mb"] = round(memory_report(load_data(path))["bytes"].sum() / 2**20, 1)
+    report["peak_rss_mb"] = _peak_rss_mb()
+    report["rss_delta_mb"] = round(report["peak_rss_mb"] - baseline, 1)
+    return report
+
+
+def _bench_backend(path: str, name: str) -> dict:
+    baseline = _peak_rss_mb()
+    timings = {}
+    backend = None
+
+    def build():
+        nonlocal backend
+        backend = get_backend(path, name)
+
+    timings["build_ms"] = _timed(build)
+    for op, fn in OPERATIONS.items():
+        timings[f"{op}_ms"] = _timed(lambda: fn(backend))
+    timings["peak_rss_mb"] = _peak_rss_mb()
+    # Mémoire ajoutée par le backend au-delà de l'interpréteur et des imports
+    timings["rss_delta_mb"] = round(timings["peak_rss_mb"] - baseline, 1)
+    return timings
+
+
+def bench_size(rows: int, backends: list[str]) -> dict:
+    path = str(dataset(rows))
+    report = {"rows": rows, **_isolated(_bench_load, path)}
+    report["backends"] = {name: _isolated(_bench_backend, path, name) for name in backends}
+    return report
+
+
+def _previous_result() -> dict | None:
+    runs = sorted(RESULTS_DIR.glob("*.json"))
+    return json.loads(runs[-1].read_text()) if runs else None
+
+
+def _regressions(current: dict, previous: dict, threshold: float) -> list[str]:
+    """Timings more than ``threshold`` (ratio) slower than the previous run."""
+    before = {size["rows"]: size for size in previous.get("sizes", [])}
+    found = []
+    for size in current["sizes"]:
+        old = before.get(size["rows"])
+        if not old:
+            continue
+        pairs = [("", size, old)] + [
+            (f"{name}.", timings, old["backends"][name])
+            for name, timings in size["backends"].items()
+            if name in old.get("backends", {})
+        ]
+        for prefix, new_stats, old_stats in pairs:
+            for key, value in new_stats.items():
+                ref = old_stats.get(key)
+                # Ignore les mesures trop courtes (bruit)
+                if key.endswith("_ms") and ref and ref >= 1 and value > ref * (1 + threshold):
+                    found.append(f"{size['rows']:>11} {prefix}{key}: {ref} → {value} ms")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1e5, 1e6])
+    parser.add_argument("--backends", nargs="+", default=["cube", "streaming", "pandas", "duckdb"])
+    parser.add_argument("--threshold", type=float, default=0.2, help="écart signalé (0.2 = +20 %%)")
+    parser.add_argument("--no-save", action="store_true", help="ne pas enregistrer le résultat")
+    args = parser.parse_args()
+
+    previous = _previous_result()
+    result = {
+        "revision": _git_revision(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "sizes": [bench_size(int(rows), args.backends) for rows in args.sizes],
+    }
+
+    print(f"{'lignes':>11} {'backend':<10} {'mesure (ms / Mo)':<28} {'valeur':>10}")
+    for size in result["sizes"]:
+        for key in ("snapshot_build_ms", "shared_build_ms", "load_ms", "peak_rss_mb", "rss_delta_mb"):
+            if key in size:
+                print(f"{size['rows']:>11} {'-':<10} {key:<28} {size[key]:>10}")
+        for name, timings in size["backends"].items():
+            for key, value in timings.items():
+                print(f"{size['rows']:>11} {name:<10} {key:<28} {value:>10}")
+
+    if previous:
+        regressions = _regressions(result, previous, args.threshold)
+        print(f"\nComparaison avec {previous['revision']} ({previous['timestamp']}) :")
+        print("\n".join(regressions) if regressions else "aucune régression")
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = result["timestamp"].replace(":", "").replace("-", "")
+        out = RESULTS_DIR / f"{stamp}-{result['revision']}.json"
+        out.write_text(json.dumps(result, indent=2))
+        print(f"\nRésultat enregistré dans {out.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
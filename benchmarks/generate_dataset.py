@@ -0,0 +1,122 @@
+"""Generate a synthetic sales CSV with the schema of ``data/e_commerce_sales.csv``.
+
+Usage (depuis la racine du projet) :
+
+    python -m benchmarks.generate_dataset --rows 1e6 --out data/synthetic_1e6.csv
+
+Les lignes sont produites par blocs vectorisés (numpy) puis ajoutées au CSV,
+ce qui permet de générer 1e8 lignes sans tout garder en mémoire.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Catalogue repris du jeu de données d'origine : (produit, catégorie, prix)
+CATALOG = [
+    ("Smartphone X", "Électronique", 699),
+    ("Casque Audio Pro", "Électronique", 129),
+    ("Écouteurs Sans Fil", "Électronique", 59),
+    ("Ordinateur Portable Y", "Électronique", 999),
+    ("Clavier Mécanique", "Électronique", 85),
+    ("Lunettes VR", "Électronique", 299),
+    ("Souris Gaming", "Électronique", 49),
+    ("Chaise Confort", "Maison", 89),
+    ("Lampe LED Design", "Maison", 59),
+    ("Bureau Ergonomique", "Maison", 250),
+    ("Table Basse Bois", "Maison", 120),
+    ("Montre Sport", "Accessoires", 149),
+    ("Bouteille Isotherme", "Accessoires", 30),
+    ("Basket Running", "Fitness", 79),
+    ("Tapis de Yoga", "Fitness", 25),
+    ("Ballons Pilates", "Fitness", 18),
+    ("Gourde Sport", "Fitness", 22),
+    ("Four Micro-ondes", "Électroménager", 140),
+    ("Aspirateur Robot", "Électroménager", 399),
+    ("Cafetière Filtre", "Électroménager", 85),
+]
+REGIONS = [
+    "Île-de-France",
+    "Auvergne-Rhône-Alpes",
+    "Nouvelle-Aquitaine",
+    "Occitanie",
+    "Hauts-de-France",
+    "PACA",
+    "Grand Est",
+    "Bretagne",
+    "Normandie",
+    "Centre-Val de Loire",
+]
+# Poids de population approximatifs (les grandes régions vendent plus)
+REGION_WEIGHTS = np.array([18, 12, 9, 9, 9, 8, 8, 5, 5, 4], dtype=float)
+CHUNK_ROWS = 1_000_000
+
+
+def generate_sales(
+    n_rows: int,
+    seed: int = 0,
+    start: str = "2022-01-01",
+    days: int = 3 * 365,
+    first_order_id: int = 1001,
+) -> pd.DataFrame:
+    """Return ``n_rows`` synthetic orders (schema of the original CSV)."""
+    rng = np.random.default_rng(seed)
+    # Produits bon marché plus fréquents que les produits chers
+    prices = np.array([price for _, _, price in CATALOG], dtype=float)
+    product_weights = 1 / np.sqrt(prices)
+    product_idx = rng.choice(len(CATALOG), n_rows, p=product_weights / product_weights.sum())
+    products = np.array([name for name, _, _ in CATALOG], dtype=object)
+    categories = np.array([category for _, category, _ in CATALOG], dtype=object)
+
+    # Saisonnalité : pic de fin d'année
+    day_offsets = np.arange(days)
+    seasonality = 1 + 0.5 * np.exp(-(((day_offsets % 365) - 340) ** 2) / 400)
+    day_idx = rng.choice(days, n_rows, p=seasonality / seasonality.sum())
+    # Dates au jour, comme le CSV d'origine (déjà formatées : to_csv est bien plus rapide)
+    dates = np.datetime_as_string(np.datetime64(start, "D") + day_idx, unit="D")
+
+    return pd.DataFrame(
+        {
+            "order_id": np.arange(first_order_id, first_order_id + n_rows),
+            "date": dates,
+            "product": products[product_idx],
+            "category": categories[product_idx],
+            "unit_price": prices[product_idx].astype(int),
+            "quantity": np.minimum(rng.geometric(0.6, n_rows), 10),
+            "region": rng.choice(REGIONS, n_rows, p=REGION_WEIGHTS / REGION_WEIGHTS.sum()),
+            "customer_age": np.clip(rng.normal(38, 12, n_rows).round(), 18, 80).astype(int),
+            "customer_gender": rng.choice(["F", "M"], n_rows),
+        }
+    )
+
+
+def write_dataset(path: str | Path, n_rows: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS) -> Path:
+    """Write ``n_rows`` synthetic orders to ``path`` chunk by chunk."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    written = 0
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        while written < n_rows:
+            size = min(chunk_rows, n_rows - written)
+            chunk = generate_sales(size, seed=seed + written, first_order_id=1001 + written)
+            chunk.to_csv(f, index=False, header=written == 0)
+            written += size
+    tmp.replace(path)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=float, required=True, help="nombre de lignes (ex. 1e6)")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    path = write_dataset(args.out, int(args.rows), args.seed)
+    print(f"{int(args.rows):,} lignes écrites dans {path}".replace(",", " "))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Simulate concurrent authenticated users driving the app headlessly (AppTest).
+
+Usage (depuis la racine du projet) :
+
+    python -m benchmarks.load_test --sessions 20 --reruns 30
+
+Chaque session virtuelle se connecte via le backend d'authentification SQLite
+en mémoire, ouvre les pages dans un ordre aléatoire, recharge la page ou clique
+sur une pastille de région. Le rapport donne la latence des reruns
+(p50/p95/p99) par page, le débit global et la mémoire maximale (RSS).
+
+AppTest n'est pas thread-safe (runtime global) : les sessions sont réparties
+sur ``--workers`` processus, chacun alternant entre ses sessions comme le
+ferait un serveur Streamlit dont les reruns se partagent le GIL.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import multiprocessing
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# À positionner avant l'import des modules d'authentification
+os.environ["AUTH_BACKEND"] = "sqlite"
+os.environ["AUTH_SQLITE_PATH"] = ":memory:"
+os.environ.setdefault("LOGIN_RATE_LIMIT", str(10**9))
+os.environ.setdefault("HASH_QUEUE_LIMIT", str(10**6))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from utils.auth import get_auth, get_authenticator  # noqa: E402
+
+PAGES = ["main.py", "pages/ventes.py", "pages/analyses.py", "pages/clients.py"]
+TIMEOUT_S = 120
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _peak_rss_mb() -> float:
+    # VmHWM : pic du processus lui-même (ru_maxrss hérite du pic du parent au fork)
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss est en Ko sous Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _login(index: int) -> dict:
+    auth = get_authenticator()
+    email = f"load{index}@test.local"
+    auth.create_user(email, f"load{index}", "motdepasse")
+    user = auth.authenticate_user(email, "motdepasse")
+    return {"session_token": auth.create_session(user["id"]), "user_id": user["id"]}
+
+
+class VirtualSession:
+    """One simulated analyst: a logged-in AppTest per page."""
+
+    def __init__(self, index: int, seed: int):
+        self.rng = random.Random(seed + index)
+        self.state = _login(index)
+        self.apps: dict[str, AppTest] = {}
+
+    def _app(self, page: str) -> AppTest:
+        if page not in self.apps:
+            # Première visite : nouvelle page déjà authentifiée
+            app = AppTest.from_file(str(ROOT / page), default_timeout=TIMEOUT_S)
+            for key, value in self.state.items():
+                app.session_state[key] = value
+            self.apps[page] = app
+        return self.apps[page]
+
+    def step(self) -> tuple[str, str, float, list[str]]:
+        """Run one user action and return (page, action, seconds, errors)."""
+        page = self.rng.choice(PAGES)
+        opened = page in self.apps
+        app = self._app(page)
+        started = time.perf_counter()
+        if opened and page == "pages/analyses.py" and app.pills:
+            # Page déjà affichée : clic sur une autre région
+            pills = app.pills[0]
+            action = "pill"
+            pills.set_value(self.rng.choice(pills.options)).run()
+        else:
+            action = "rerun" if opened else "open"
+            app.run()
+        elapsed = time.perf_counter() - started
+        return page, action, elapsed, [str(e.value) for e in app.exception]
+
+
+def _summary(latencies: list[float]) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1),
+    }
+
+
+def _worker(indices: list[int], reruns: int, seed: int) -> dict:
+    """Drive the sessions ``indices`` in turn inside one process."""
+    # Les pages lisent les données avec des chemins relatifs à la racine
+    os.chdir(ROOT)
+    get_auth().init_db()
+    users = [VirtualSession(i, seed) for i in indices]
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: list[str] = []
+    for _ in range(reruns):
+        for user in users:
+            page, action, elapsed, failures = user.step()
+            latencies[f"{page} [{action}]"].append(elapsed)
+            errors.extend(f"{page}: {failure}" for failure in failures)
+    return {"latencies": dict(latencies), "errors": errors, "peak_rss_mb": _peak_rss_mb()}
+
+
+def load_test(sessions: int, reruns: int, workers: int = 1, seed: int = 0) -> dict:
+    """Run ``reruns`` actions in each of ``sessions`` sessions over ``workers`` processes."""
+    workers = max(1, min(workers, sessions))
+    shares = [list(range(sessions))[w::workers] for w in range(workers)]
+    started = time.perf_counter()
+    # spawn : chaque processus démarre avec un runtime Streamlit vierge
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        results = list(pool.map(_worker, shares, [reruns] * workers, [seed] * workers))
+    elapsed = time.perf_counter() - started
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    for result in results:
+        for key, values in result["latencies"].items():
+            latencies[key].extend(values)
+            latencies["*"].extend(values)
+    return {
+        "sessions": sessions,
+        "workers": workers,
+        "reruns": sessions * reruns,
+        "duration_s": round(elapsed, 2),
+        "throughput_per_s": round(sessions * reruns / elapsed, 2),
+        "peak_rss_mb": max(result["peak_rss_mb"] for result in results),
+        "total_rss_mb": round(sum(result["peak_rss_mb"] for result in results), 1),
+        "latency": {key: _summary(values) for key, values in sorted(latencies.items())},
+        "errors": [error for result in results for error in result["errors"]][:20],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10, help="sessions simultanées")
+    parser.add_argument("--reruns", type=int, default=20, help="actions par session")
+    parser.add_argument("--workers", type=int, default=1, help="processus serveurs simulés")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    report = load_test(args.sessions, args.reruns, args.workers, args.seed)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{report['sessions']} sessions sur {report['workers']} processus, "
+        f"{report['reruns']} reruns en {report['duration_s']} s → {report['throughput_per_s']} reruns/s\n"
+        f"RSS max par processus {report['peak_rss_mb']} Mo, total {report['total_rss_mb']} Mo\n"
+    )
+    print(f"{'page [action]':<32} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for key, stats in report["latency"].items():
+        print(f"{key:<32} {stats['count']:>5} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+    if report["errors"]:
+        print("\nErreurs :")
+        print("\n".join(report["errors"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Import-time breakdown of the app entry points (``python -X importtime``).
+
+Usage (depuis la racine du projet) :
+
+    python -m benchmarks.startup_profile --top 15
+    python -m benchmarks.startup_profile utils.charts utils.aggregations
+
+Chaque scénario est importé dans un interpréteur neuf ; le rapport donne le
+temps total et les modules les plus coûteux (cumulé et propre).
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules importés avant l'affichage de chaque écran
+SCENARIOS = {
+    "connexion": [
+        "streamlit",
+        "streamlit_extras.stylable_container",
+        "utils.auth",
+        "utils.auth_supabase",
+    ],
+    "pages": [
+        "streamlit",
+        "streamlit_extras.stylable_container",
+        "utils.auth",
+        "utils.auth_supabase",
+        "utils.aggregations",
+        "utils.charts",
+    ],
+}
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(modules: list[str]) -> list[dict]:
+    """Import ``modules`` in a fresh interpreter and parse ``-X importtime``."""
+    code = "; ".join(f"import {module}" for module in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append(
+                {
+                    "module": name,
+                    "self_ms": int(self_us) / 1000,
+                    "cumulative_ms": int(cumulative_us) / 1000,
+                    "depth": (len(indent) - 1) // 2,
+                }
+            )
+    if proc.returncode:
+        print(proc.stderr.splitlines()[-1], file=sys.stderr)
+    return rows
+
+
+def report(name: str, rows: list[dict], top: int) -> None:
+    total = sum(row["self_ms"] for row in rows)
+    print(f"\n=== {name} : {total:.0f} ms, {len(rows)} modules")
+    print(f"{'cumulé ms':>10} {'propre ms':>10}  module")
+    roots = sorted((r for r in rows if r["depth"] == 0), key=lambda r: -r["cumulative_ms"])
+    for row in roots[:top]:
+        print(f"{row['cumulative_ms']:>10.1f} {row['self_ms']:>10.1f}  {row['module']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", help="modules à profiler (sinon les scénarios)")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    scenarios = {"modules": args.modules} if args.modules else SCENARIOS
+    for name, modules in scenarios.items():
+        report(name, profile(modules), args.top)
+
+
+if __name__ == "__main__":
+    main()
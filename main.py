@@ -1,23 +1,22 @@
 import streamlit as st
 from streamlit_extras.stylable_container import stylable_container
 
-# Auth Supabase
-from utils.auth_supabase import require_login, auth_form, delete_session
-
-# Données
-from utils.data_loader import load_data
-
-
-# ============================================================
-#                 CONFIGURATION DE LA PAGE
-# ============================================================
-st.set_page_config(
-    page_title="Dashboard E-commerce",
-    layout="wide",
-)
-
-# Style global
-st.markdown("""
+# Auth (backend choisi par AUTH_BACKEND, Supabase par défaut)
+from utils.auth import require_login, auth_form, delete_session
+from utils.instrumentation import span
+
+# Durée de rendu de la page (span page.accueil), enregistrée aussi sur st.stop/st.rerun
+with span("page.accueil"):
+    # ============================================================
+    #                 CONFIGURATION DE LA PAGE
+    # ============================================================
+    st.set_page_config(
+        page_title="Dashboard E-commerce",
+        layout="wide",
+    )
+
+    # Style global
+    st.markdown("""
 <style>
 .stApp {
     background: linear-gradient(135deg, #D0E8FF, #4DD0E1);
@@ -26,12 +25,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# ============================================================
-#                         HEADER
-# ============================================================
-with stylable_container(
-    key="header",
-    css_styles="""
+    # ============================================================
+    #                         HEADER
+    # ============================================================
+    with stylable_container(
+        key="header",
+        css_styles="""
         {
             background: linear-gradient(135deg, #1B4F72, #11608A);
             padding-top: 0.5px;
@@ -59,41 +58,45 @@ with stylable_container(
             h1 { font-size: 2rem; }
         }
     """,
-):
-    st.markdown("<h1>Dashboard E-commerce</h1>", unsafe_allow_html=True)
+    ):
+        st.markdown("<h1>Dashboard E-commerce</h1>", unsafe_allow_html=True)
+
 
+    # ============================================================
+    #                 AUTHENTIFICATION
+    # ============================================================
 
-# ============================================================
-#                 AUTHENTIFICATION
-# ============================================================
+    # Déjà connecté → montrer un message + bouton logout
+    if "user_id" in st.session_state:
+        st.success(f"Connecté : user_id = {st.session_state['user_id']}")
 
-# Déjà connecté → montrer un message + bouton logout
-if "user_id" in st.session_state:
-    st.success(f"Connecté : user_id = {st.session_state['user_id']}")
+        if st.button("Déconnexion"):
+            delete_session(st.session_state.get("session_token"))
+            st.session_state.clear()
+            st.rerun()
 
-    if st.button("Déconnexion"):
-        delete_session(st.session_state.get("session_token"))
-        st.session_state.clear()
-        st.rerun()
+    else:
+        # Pas connecté → afficher le formulaire + stopper l'app
+        auth_form()
+        st.stop()
 
-else:
-    # Pas connecté → afficher le formulaire + stopper l'app
-    auth_form()
-    st.stop()
 
+    # ============================================================
+    #                 CHARGEMENT DES DONNÉES
+    # ============================================================
+    # Import après l'authentification : l'écran de connexion ne charge pas pandas
+    from utils.streaming import iter_chunks  # noqa: E402
 
-# ============================================================
-#                 CHARGEMENT DES DONNÉES
-# ============================================================
-df = load_data("data/e_commerce_sales.csv")
+    # Aperçu : seules les premières lignes sont lues (mémoire bornée)
+    df = next(iter_chunks("data/e_commerce_sales.csv", chunksize=5), None)
 
-if df is None or df.empty:
-    st.error("Impossible de charger les données.")
-    st.stop()
+    if df is None or df.empty:
+        st.error("Impossible de charger les données.")
+        st.stop()
 
 
-# ============================================================
-#                AFFICHAGE APERÇU DES DONNÉES
-# ============================================================
-st.subheader("Aperçu des données")
-st.dataframe(df.head())
+    # ============================================================
+    #                AFFICHAGE APERÇU DES DONNÉES
+    # ============================================================
+    st.subheader("Aperçu des données")
+    st.dataframe(df.head())
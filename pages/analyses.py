@@ -1,33 +1,39 @@
 from streamlit_extras.stylable_container import stylable_container
 import streamlit as st
 
-from utils.auth_supabase import require_login
-from utils.charts import plot_sales_by_category
-from utils.data_loader import load_data
+from utils.auth import require_login
+from utils.aggregations import get_backend
+from utils.charts import show_sales_by_category
+from utils.filters import filter_sidebar
+from utils.instrumentation import span
 
-# ----------------------------------------------------------
-# 🎨 Background global
-# ----------------------------------------------------------
-st.markdown(
-    """
+DATA_PATH = "data/e_commerce_sales.csv"
+
+# Durée de rendu de la page (span page.analyses), enregistrée aussi sur st.stop/st.rerun
+with span("page.analyses"):
+    # ----------------------------------------------------------
+    # 🎨 Background global
+    # ----------------------------------------------------------
+    st.markdown(
+        """
 <style>
 .stApp {
     background: linear-gradient(135deg, #D0E8FF, #4DD0E1);
 }
 </style>
 """,
-    unsafe_allow_html=True,
-)
+        unsafe_allow_html=True,
+    )
 
-# --- Auth ---
-require_login()
+    # --- Auth ---
+    require_login()
 
-# ----------------------------------------------------------
-# 🏷️ HEADER IDENTIQUE À VENTES.PY
-# ----------------------------------------------------------
-with stylable_container(
-    key="header_analyses",
-    css_styles="""
+    # ----------------------------------------------------------
+    # 🏷️ HEADER IDENTIQUE À VENTES.PY
+    # ----------------------------------------------------------
+    with stylable_container(
+        key="header_analyses",
+        css_styles="""
         {
             padding: 8px 0;
             color: black;
@@ -39,36 +45,34 @@ with stylable_container(
             color: black !important;
         }
     """,
-):
-    st.markdown("<h1>Analyses</h1>", unsafe_allow_html=True)
-
-# ----------------------------------------------------------
-# 📊 Load Data
-# ----------------------------------------------------------
-df = load_data("data/e_commerce_sales.csv")
-regions = sorted(df["region"].unique())
+    ):
+        st.markdown("<h1>Analyses</h1>", unsafe_allow_html=True)
 
-st.subheader("🌍 Analyses régionales")
+    # ----------------------------------------------------------
+    # 📊 Load Data
+    # ----------------------------------------------------------
+    backend = get_backend(DATA_PATH, filters=filter_sidebar(DATA_PATH))
+    regions = backend.distinct_values("region")
 
-# ----------------------------------------------------------
-# 📌 Selection région (pills)
-# ----------------------------------------------------------
-region = st.pills(
-    label="Sélectionner une région :",
-    options=regions,
-    default=regions[0],
-)
+    st.subheader("🌍 Analyses régionales")
 
-df_region = df[df["region"] == region]
+    # ----------------------------------------------------------
+    # 📌 Selection région (pills)
+    # ----------------------------------------------------------
+    region = st.pills(
+        label="Sélectionner une région :",
+        options=regions,
+        default=regions[0] if regions else None,
+    )
 
-st.write(f"Analyse pour la région : **{region}**")
+    st.write(f"Analyse pour la région : **{region}**")
 
-# ----------------------------------------------------------
-# 📦 Graphique dans une carte stylée
-# ----------------------------------------------------------
-with stylable_container(
-    key="graph_card",
-    css_styles="""
+    # ----------------------------------------------------------
+    # 📦 Graphique dans une carte stylée
+    # ----------------------------------------------------------
+    with stylable_container(
+        key="graph_card",
+        css_styles="""
         {
             background: #E3F2FD;
             padding: 25px;
@@ -81,6 +85,6 @@ with stylable_container(
             font-size: 1.3rem;
         }
     """,
-):
-    st.markdown("### 📦 Ventes par catégorie")
-    plot_sales_by_category(df_region)
+    ):
+        st.markdown("### 📦 Ventes par catégorie")
+        show_sales_by_category(backend, region=region)
@@ -0,0 +1,75 @@
+import streamlit as st
+
+from utils.auth import require_admin
+from utils.figure_cache import get_figure_cache
+from utils.instrumentation import ENABLED, get_registry
+
+# --- Auth (administrateurs uniquement) ---
+require_admin()
+
+st.title("⏱️ Performance")
+
+if not ENABLED:
+    st.warning("Instrumentation désactivée (DASHBOARD_INSTRUMENTATION=0).")
+    st.stop()
+
+registry = get_registry()
+spans = registry.spans()
+
+# ----------------------------------------------------------
+# 📄 Rendu des pages
+# ----------------------------------------------------------
+st.subheader("📄 Rendu des pages")
+pages = [row for row in spans if row["name"].startswith("page.")]
+if pages:
+    st.dataframe(pages, use_container_width=True, hide_index=True)
+else:
+    st.info("Aucune page mesurée pour l'instant.")
+
+# ----------------------------------------------------------
+# 🔥 Chemin critique
+# ----------------------------------------------------------
+st.subheader("🔥 Spans (require_login, load_data, metrics, figures)")
+st.dataframe(
+    [row for row in spans if not row["name"].startswith("page.")],
+    use_container_width=True,
+    hide_index=True,
+)
+
+# ----------------------------------------------------------
+# 🗃️ Caches
+# ----------------------------------------------------------
+st.subheader("🗃️ Caches")
+st.dataframe(registry.caches(), use_container_width=True, hide_index=True)
+figures = get_figure_cache()
+st.caption(f"Cache de figures : {len(figures)} / {figures.max_size} entrées")
+
+# ----------------------------------------------------------
+# 🔐 Hachage des mots de passe
+# ----------------------------------------------------------
+st.subheader("🔐 Hachage des mots de passe")
+hashing = [row for row in registry.counts() if row["name"].startswith("hashing.")]
+if hashing:
+    st.dataframe(hashing, use_container_width=True, hide_index=True)
+else:
+    st.info("Aucun hachage depuis le démarrage du serveur.")
+
+# ----------------------------------------------------------
+# 📤 Export
+# ----------------------------------------------------------
+col1, col2, col3 = st.columns(3)
+col1.download_button(
+    "Export Prometheus",
+    registry.to_prometheus(),
+    file_name="dashboard_metrics.prom",
+    mime="text/plain",
+)
+col2.download_button(
+    "Export JSON lines",
+    registry.to_jsonl(),
+    file_name="dashboard_metrics.jsonl",
+    mime="application/x-ndjson",
+)
+if col3.button("Réinitialiser"):
+    registry.reset()
+    st.rerun()
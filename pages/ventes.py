@@ -1,18 +1,22 @@
 import streamlit as st
-import time
 from streamlit_extras.stylable_container import stylable_container
 
-from utils.auth_supabase import require_login
-from utils.charts import plot_sales_by_category, plot_sales_over_time
-from utils.data_loader import load_data
-from utils.metrics import total_revenue, average_order_value, top_products
+from utils.auth import require_login
+from utils.aggregations import get_backend
+from utils.charts import show_sales_by_category, show_sales_over_time
+from utils.filters import filter_sidebar
+from utils.instrumentation import span
+from utils.periods import growth, monthly, period_kpis, rolling
 
+DATA_PATH = "data/e_commerce_sales.csv"
 
-# ------------------------------
-# BACKGROUND GLOBAL
-# ------------------------------
-st.markdown(
-    """
+# Durée de rendu de la page (span page.ventes), enregistrée aussi sur st.stop/st.rerun
+with span("page.ventes"):
+    # ------------------------------
+    # BACKGROUND GLOBAL
+    # ------------------------------
+    st.markdown(
+        """
 <style>
 .stApp {
     background: linear-gradient(135deg, #D0E8FF, #4DD0E1);
@@ -30,22 +34,38 @@ st.markdown(
     opacity: 0.85;
     margin-top: 4px;
 }
+
+.kpi-delta {
+    font-size: 0.85rem;
+    margin-top: 2px;
+}
+
+/* Animation côté navigateur : la valeur finale est envoyée une seule fois */
+.kpi-animated {
+    animation: kpi-in 0.9s ease-out both;
+}
+
+@keyframes kpi-in {
+    from { opacity: 0.1; transform: translateY(8px); }
+    to   { opacity: 1;   transform: translateY(0); }
+}
 </style>
 """,
-    unsafe_allow_html=True,
-)
+        unsafe_allow_html=True,
+    )
 
-# Auth obligatoire
-require_login()
+    # Auth obligatoire
+    require_login()
 
-# Load data
-df = load_data("data/e_commerce_sales.csv")
+    # Backend d'agrégation (DASHBOARD_BACKEND) ; filtres globaux partagés entre les pages
+    filters = filter_sidebar(DATA_PATH)
+    backend = get_backend(DATA_PATH, filters=filters)
 
-# 🏷️ HEADER IDENTIQUE AUX AUTRES PAGES
-# ------------------------------------------------------
-with stylable_container(
-    key="header_ventes",
-    css_styles="""
+    # 🏷️ HEADER IDENTIQUE AUX AUTRES PAGES
+    # ------------------------------------------------------
+    with stylable_container(
+        key="header_ventes",
+        css_styles="""
         {
             padding: 8px 0;
             color: black;
@@ -57,54 +77,32 @@ with stylable_container(
             color: black !important;
         }
     """,
-):
-    st.markdown("<h1>Ventes</h1>", unsafe_allow_html=True)
-
+    ):
+        st.markdown("<h1>Ventes</h1>", unsafe_allow_html=True)
 
-# ---------------------------------------------------
-# 🔥 Animation des chiffres
-# ---------------------------------------------------
-def animate_number(final_value, duration=0.9, steps=35, integer=False, euro=False):
-    placeholder = st.empty()
-    increment = final_value / steps
-    delay = duration / steps
-    current = 0
 
-    for _ in range(steps):
+    # ---------------------------------------------------
+    # 🔥 Affichage animé des chiffres (CSS, sans time.sleep)
+    # ---------------------------------------------------
+    def animate_number(final_value, integer=False, euro=False):
         if integer:
-            value = f"{int(current):,}".replace(",", " ")
+            value = f"{int(final_value):,}".replace(",", " ")
         else:
-            value = f"{current:,.2f}".replace(",", " ")
+            value = f"{final_value:,.2f}".replace(",", " ")
 
         if euro:
             value += " €"
 
-        placeholder.markdown(
-            f"<div class='kpi-value'>{value}</div>",
+        st.markdown(
+            f"<div class='kpi-value kpi-animated'>{value}</div>",
             unsafe_allow_html=True,
         )
-        current += increment
-        time.sleep(delay)
 
-    # Valeur finale
-    if integer:
-        value = f"{int(final_value):,}".replace(",", " ")
-    else:
-        value = f"{final_value:,.2f}".replace(",", " ")
-
-    if euro:
-        value += " €"
-
-    placeholder.markdown(
-        f"<div class='kpi-value'>{value}</div>",
-        unsafe_allow_html=True,
-    )
 
-
-# ---------------------------------------------------
-# 🧊 CARDS STYLE
-# ---------------------------------------------------
-CARD_STYLE = """
+    # ---------------------------------------------------
+    # 🧊 CARDS STYLE
+    # ---------------------------------------------------
+    CARD_STYLE = """
 {
     background: #E0F7FA;
     padding: 25px;
@@ -116,51 +114,130 @@ CARD_STYLE = """
 """
 
 
-# ---------------------------------------------------
-# 📊 KPI SECTION (bien alignés)
-# ---------------------------------------------------
-st.subheader("📊 Indicateurs clés")
-k1, k2, k3 = st.columns([1, 1, 1], gap="large")
-
-# KPI 1 – Chiffre d'affaires
-with k1:
-    with stylable_container(key="kpi1", css_styles=CARD_STYLE):
-        animate_number(float(total_revenue(df)), integer=True, euro=True)
-        st.markdown("<div class='kpi-label'>Chiffre d'affaires total</div>", unsafe_allow_html=True)
-
-# KPI 2 – Panier moyen
-with k2:
-    with stylable_container(key="kpi2", css_styles=CARD_STYLE):
-        animate_number(float(average_order_value(df)), integer=False, euro=True)
-        st.markdown("<div class='kpi-label'>Panier moyen</div>", unsafe_allow_html=True)
-
-# KPI 3 – Produit le plus vendu
-with k3:
-    with stylable_container(key="kpi3", css_styles=CARD_STYLE):
-
-        # Petite animation de fade-in
-        best = top_products(df, 1).iloc[0]["product"]
-        ph = st.empty()
-        for op in [0.1, 0.3, 0.6, 0.8, 1]:
-            ph.markdown(
-                f"<div style='font-size:1.5rem;font-weight:700;opacity:{op};'>{best}</div>",
+    # ---------------------------------------------------
+    # 📊 KPI SECTION (bien alignés)
+    # ---------------------------------------------------
+    st.subheader("📊 Indicateurs clés")
+    k1, k2, k3 = st.columns([1, 1, 1], gap="large")
+
+    # KPI 1 – Chiffre d'affaires
+    with k1:
+        with stylable_container(key="kpi1", css_styles=CARD_STYLE):
+            animate_number(backend.total_revenue(), integer=True, euro=True)
+            st.markdown("<div class='kpi-label'>Chiffre d'affaires total</div>", unsafe_allow_html=True)
+
+    # KPI 2 – Panier moyen
+    with k2:
+        with stylable_container(key="kpi2", css_styles=CARD_STYLE):
+            animate_number(backend.average_order_value(), integer=False, euro=True)
+            st.markdown("<div class='kpi-label'>Panier moyen</div>", unsafe_allow_html=True)
+
+    # KPI 3 – Produit le plus vendu
+    with k3:
+        with stylable_container(key="kpi3", css_styles=CARD_STYLE):
+
+            # Petite animation de fade-in (CSS)
+            best = backend.top_products(1).iloc[0]["product"]
+            st.markdown(
+                f"<div class='kpi-animated' style='font-size:1.5rem;font-weight:700;'>{best}</div>",
                 unsafe_allow_html=True,
             )
-            time.sleep(0.05)
 
-        st.markdown("<div class='kpi-label'>Produit le plus vendu</div>", unsafe_allow_html=True)
+            st.markdown("<div class='kpi-label'>Produit le plus vendu</div>", unsafe_allow_html=True)
+
+
+    # ---------------------------------------------------
+    # 📅 TENDANCES (calculées sur l'agrégat journalier)
+    # ---------------------------------------------------
+    def format_change(change):
+        if change is None:
+            return "—"
+        color = "#2E7D32" if change >= 0 else "#C62828"
+        return f"<span style='color:{color}'>{change:+.1%}</span>".replace(".", ",")
+
+
+    def delta_line(*parts):
+        st.markdown(
+            "<div class='kpi-delta'>" + " · ".join(parts) + "</div>",
+            unsafe_allow_html=True,
+        )
+
+
+    date_index = backend.date_index()
+    periods = period_kpis(date_index, filters)
 
+    if periods is None:
+        st.caption("Tendances indisponibles avec les filtres produit, âge ou genre.")
+    else:
+        st.subheader(f"📅 Tendances au {periods['as_of']:%d/%m/%Y}")
+        t1, t2, t3 = st.columns([1, 1, 1], gap="large")
+
+        # Mois en cours comparé au même nombre de jours du mois précédent et de l'an dernier
+        with t1:
+            with stylable_container(key="trend1", css_styles=CARD_STYLE):
+                animate_number(periods["month_to_date"], integer=True, euro=True)
+                st.markdown("<div class='kpi-label'>CA du mois en cours</div>", unsafe_allow_html=True)
+                delta_line(f"M-1 : {format_change(periods['mom'])}", f"N-1 : {format_change(periods['yoy'])}")
+
+        with t2:
+            with stylable_container(key="trend2", css_styles=CARD_STYLE):
+                rolling_7 = periods["rolling_7"]
+                animate_number(rolling_7["total_price"], integer=True, euro=True)
+                st.markdown("<div class='kpi-label'>CA sur 7 jours glissants</div>", unsafe_allow_html=True)
+                delta_line(f"vs 7 jours précédents : {format_change(rolling_7['change'])}")
 
-# ---------------------------------------------------
-# 📈 GRAPHES – UN EN DESSOUS DE L'AUTRE
-# ---------------------------------------------------
+        with t3:
+            with stylable_container(key="trend3", css_styles=CARD_STYLE):
+                rolling_30 = periods["rolling_30"]
+                animate_number(rolling_30["average_order_value"] or 0, integer=False, euro=True)
+                st.markdown("<div class='kpi-label'>Panier moyen sur 30 jours</div>", unsafe_allow_html=True)
+                delta_line(f"CA 30 jours vs précédents : {format_change(rolling_30['change'])}")
 
-st.subheader("📈 Visualisation des ventes")
+        with st.expander("Croissance sur 30 jours par catégorie et par région"):
+            g1, g2 = st.columns(2)
+            for column, dimension in ((g1, "category"), (g2, "region")):
+                column.dataframe(
+                    growth(
+                        date_index,
+                        dimension,
+                        as_of=periods["as_of"],
+                        category=filters.categories,
+                        region=filters.regions,
+                    ),
+                    column_config={"growth": st.column_config.NumberColumn(format="percent")},
+                    hide_index=True,
+                    use_container_width=True,
+                )
+
+        with st.expander("CA glissant sur 30 jours et synthèse mensuelle"):
+            slice_ = {"category": filters.categories, "region": filters.regions}
+            window = rolling(date_index, 30, **slice_)
+            st.line_chart(window, x="date", y="total_price", use_container_width=True)
+            st.dataframe(
+                monthly(date_index, **slice_).sort_values("month", ascending=False),
+                column_config={
+                    "month": st.column_config.DateColumn("Mois", format="MM/YYYY"),
+                    "total_price": st.column_config.NumberColumn("CA", format="%.2f €"),
+                    "orders": st.column_config.NumberColumn("Commandes"),
+                    "average_order_value": st.column_config.NumberColumn("Panier moyen", format="%.2f €"),
+                    "mom": st.column_config.NumberColumn("M-1", format="percent"),
+                    "yoy": st.column_config.NumberColumn("N-1", format="percent"),
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
 
-# Graphique 1 – Ventes par catégorie
-with stylable_container(
-    key="graph1",
-    css_styles="""
+
+    # ---------------------------------------------------
+    # 📈 GRAPHES – UN EN DESSOUS DE L'AUTRE
+    # ---------------------------------------------------
+
+    st.subheader("📈 Visualisation des ventes")
+
+    # Graphique 1 – Ventes par catégorie
+    with stylable_container(
+        key="graph1",
+        css_styles="""
         {
             background: #E3F2FD;
             padding: 25px;
@@ -169,14 +246,14 @@ with stylable_container(
             box-shadow: 0 5px 25px rgba(0,0,0,0.10);
         }
     """,
-):
-    st.markdown("### 📌 Ventes par catégorie")
-    plot_sales_by_category(df)
-
-# Graphique 2 – Évolution des ventes
-with stylable_container(
-    key="graph2",
-    css_styles="""
+    ):
+        st.markdown("### 📌 Ventes par catégorie")
+        show_sales_by_category(backend)
+
+    # Graphique 2 – Évolution des ventes
+    with stylable_container(
+        key="graph2",
+        css_styles="""
         {
             background: #E3F2FD;
             padding: 25px;
@@ -186,6 +263,6 @@ with stylable_container(
             box-shadow: 0 5px 25px rgba(0,0,0,0.10);
         }
     """,
-):
-    st.markdown("### 📆 Évolution des ventes")
-    plot_sales_over_time(df)
+    ):
+        st.markdown("### 📆 Évolution des ventes")
+        show_sales_over_time(backend)
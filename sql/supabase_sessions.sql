@@ -0,0 +1,8 @@
+-- Index de la table sessions (Supabase / PostgreSQL)
+-- À exécuter une fois dans l'éditeur SQL de Supabase.
+
+-- Purge des sessions expirées (utils.auth_supabase.purge_expired_sessions)
+CREATE INDEX IF NOT EXISTS sessions_expires_at_idx ON sessions (expires_at);
+
+-- restore_session : ORDER BY created_at DESC LIMIT 1
+CREATE INDEX IF NOT EXISTS sessions_created_at_idx ON sessions (created_at DESC);
@@ -0,0 +1,159 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cube import MEASURES, build_cube
+from utils.date_index import DateIndex, cube_index
+
+REGIONS = ["Bretagne", "Occitanie", "PACA"]
+CATEGORIES = ["Électronique", "Maison", "Fitness", "Accessoires"]
+
+
+def make_sales(seed: int, with_time: bool = False) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = 2000
+    # Jours sans commande inclus : le calendrier doit rester continu
+    days = rng.choice(np.arange(0, 200, 3), n)
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(days, unit="D")
+    if with_time:
+        dates += pd.to_timedelta(rng.integers(0, 24 * 60, n), unit="min")
+    quantity = rng.integers(1, 4, n)
+    unit_price = rng.integers(100, 100_000, n) / 100
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "category": rng.choice(CATEGORIES, n),
+            "region": rng.choice(REGIONS, n),
+            "product": rng.choice(["A", "B", "C"], n),
+            "quantity": quantity,
+            "total_price": unit_price * quantity,
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def sales():
+    return make_sales(3)
+
+
+@pytest.fixture(scope="module")
+def index(sales):
+    return cube_index(build_cube(sales))
+
+
+def select(df, start=None, end=None, category=None, region=None) -> pd.DataFrame:
+    days = df["date"].dt.normalize()
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= days >= pd.Timestamp(start)
+    if end is not None:
+        keep &= days <= pd.Timestamp(end)
+    for column, selection in (("category", category), ("region", region)):
+        if selection is not None:
+            values = [selection] if isinstance(selection, str) else list(selection)
+            if values:
+                keep &= df[column].isin(values)
+    return df[keep]
+
+
+def brute_totals(df, **kwargs) -> dict[str, float]:
+    rows = select(df, **kwargs)
+    return {
+        "total_price": rows["total_price"].sum(),
+        "quantity": rows["quantity"].sum(),
+        "orders": len(rows),
+    }
+
+
+RANGES = [
+    {},
+    {"start": datetime.date(2024, 2, 1)},
+    {"end": datetime.date(2024, 3, 15)},
+    {"start": datetime.date(2024, 1, 4), "end": datetime.date(2024, 1, 4)},
+    {"start": datetime.date(2024, 1, 5), "end": datetime.date(2024, 1, 6)},
+    {"start": datetime.date(2023, 6, 1), "end": datetime.date(2026, 1, 1)},
+    {"start": datetime.date(2025, 1, 1)},
+    {"end": datetime.date(2023, 12, 31)},
+    {"start": datetime.date(2024, 3, 1), "end": datetime.date(2024, 2, 1)},
+]
+SLICES = [
+    {},
+    {"category": "Maison"},
+    {"region": "PACA"},
+    {"category": "Fitness", "region": "Bretagne"},
+    {"category": ["Maison", "Accessoires"], "region": ("PACA", "Occitanie")},
+    {"category": []},
+    {"category": "Inconnue"},
+]
+
+
+@pytest.mark.parametrize("slice_", SLICES)
+@pytest.mark.parametrize("range_", RANGES)
+def test_totals_match_pandas(sales, index, range_, slice_):
+    totals = index.totals(**range_, **slice_)
+    expected = brute_totals(sales, **range_, **slice_)
+    assert totals == pytest.approx(expected, rel=1e-12, abs=1e-6)
+
+
+@pytest.mark.parametrize("slice_", SLICES[:5])
+def test_daily_matches_groupby(sales, index, slice_):
+    range_ = {"start": datetime.date(2024, 1, 20), "end": datetime.date(2024, 4, 30)}
+    rows = select(sales, **range_, **slice_)
+    expected = (
+        rows.groupby(rows["date"].dt.normalize())
+        .agg(total_price=("total_price", "sum"), quantity=("quantity", "sum"), orders=("date", "size"))
+        .reset_index()
+    )
+    daily = index.daily(**range_, **slice_)
+    pd.testing.assert_frame_equal(daily, expected, check_dtype=False)
+
+
+def test_cumulative_is_running_total(sales, index):
+    cum = index.cumulative("Maison", ["PACA", "Bretagne"])
+    assert cum.shape == (index.n_days + 1, len(MEASURES))
+    assert (cum[0] == 0).all()
+    for offset in (0, 1, 57, index.n_days - 1):
+        day = (index.calendar[offset]).astype(datetime.date)
+        expected = brute_totals(sales, end=day, category="Maison", region=["PACA", "Bretagne"])
+        assert cum[offset + 1] == pytest.approx(list(expected.values()))
+
+
+def test_calendar_is_contiguous(sales, index):
+    first, last = sales["date"].min(), sales["date"].max()
+    assert index.n_days == (last - first).days + 1
+    assert (np.diff(index.calendar).astype(int) == 1).all()
+    assert index.rows() == (0, index.n_days)
+    assert index.rows(datetime.date(2000, 1, 1), datetime.date(2000, 1, 2)) == (0, 0)
+
+
+def test_compare(sales, index):
+    period = (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))
+    reference = (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))
+    result = index.compare(period, reference, region="Bretagne")
+    current = brute_totals(sales, start=period[0], end=period[1], region="Bretagne")["total_price"]
+    previous = brute_totals(sales, start=reference[0], end=reference[1], region="Bretagne")["total_price"]
+    assert result["current"] == pytest.approx(current)
+    assert result["previous"] == pytest.approx(previous)
+    assert result["change"] == pytest.approx((current - previous) / previous)
+
+
+def test_day_granular_flag():
+    assert cube_index(build_cube(make_sales(4))).day_granular
+    timed_sales = make_sales(5, with_time=True)
+    index = cube_index(build_cube(timed_sales))
+    assert not index.day_granular
+    # Les totaux par plage restent exacts avec des heures
+    range_ = {"start": datetime.date(2024, 2, 10), "end": datetime.date(2024, 5, 1)}
+    assert index.totals(**range_) == pytest.approx(brute_totals(timed_sales, **range_))
+
+
+def test_empty_index():
+    daily = pd.DataFrame(
+        {"date": pd.to_datetime([]), "category": [], "region": [], **{m: [] for m in MEASURES}}
+    )
+    index = DateIndex(daily)
+    assert index.n_days == 0
+    assert index.totals() == {m: 0.0 for m in MEASURES}
+    assert index.daily().empty
@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.downsampling import choose_granularity, downsample_sales, lttb
+
+
+def reference_lttb(x, y, n_out):
+    """LTTB written after Steinarsson's reference algorithm, point by point."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return list(range(n))
+    every = (n - 2) / (n_out - 2)
+    kept = [0]
+    a = 0
+    for i in range(n_out - 2):
+        start = math.floor(i * every) + 1
+        end = math.floor((i + 1) * every) + 1
+        next_start = end
+        next_end = min(math.floor((i + 2) * every) + 1, n)
+        if i == n_out - 3:
+            next_start, next_end = n - 1, n
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 3), (100, 7), (1000, 100), (1001, 333), (5000, 999)])
+def test_lttb_matches_reference(n, n_out):
+    rng = np.random.default_rng(n + n_out)
+    x = np.cumsum(rng.integers(1, 5, n)).astype(float)
+    y = rng.normal(size=n).cumsum()
+    kept = lttb(x, y, n_out)
+    assert kept.tolist() == reference_lttb(x.tolist(), y.tolist(), n_out)
+
+
+def test_lttb_keeps_endpoints_and_order():
+    rng = np.random.default_rng(0)
+    x = np.arange(2000)
+    kept = lttb(x, rng.normal(size=2000), 50)
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == 1999
+    assert (np.diff(kept) > 0).all()
+
+
+def test_lttb_keeps_an_isolated_peak():
+    y = np.zeros(1000)
+    y[637] = 100.0
+    assert 637 in lttb(np.arange(1000), y, 20)
+
+
+@pytest.mark.parametrize("n_out", [2, 1000, 5000])
+def test_lttb_returns_every_point_when_no_reduction(n_out):
+    assert lttb(np.arange(1000), np.ones(1000), n_out).tolist() == list(range(1000))
+
+
+def test_choose_granularity_picks_finest_fitting_bucket():
+    dates = pd.Series(pd.date_range("2024-01-01", periods=5000, freq="h"))
+    assert choose_granularity(dates.head(100), 1000) is None
+    assert choose_granularity(dates, 1000) == ("D", "jour")
+    assert choose_granularity(dates, 100) == ("W", "semaine")
+
+
+def test_downsample_sales_preserves_total_when_resampling():
+    rng = np.random.default_rng(1)
+    sales = pd.DataFrame(
+        {
+            "date": pd.date_range("2024-01-01", periods=5000, freq="h"),
+            "total_price": rng.uniform(0, 100, 5000),
+        }
+    ).sample(frac=1, random_state=1)
+    reduced, label = downsample_sales(sales, max_points=1000)
+    assert label == "jour"
+    expected = sales.set_index("date")["total_price"].resample("D").sum()
+    np.testing.assert_allclose(reduced["total_price"], expected.to_numpy())
+    assert reduced["date"].is_monotonic_increasing
+
+
+def test_downsample_sales_bounds_points():
+    dates = pd.date_range("2024-01-01", periods=3000, freq="D")
+    sales = pd.DataFrame({"date": dates, "total_price": np.sin(np.arange(3000) / 20)})
+    reduced, label = downsample_sales(sales, max_points=500)
+    assert label == "semaine"
+    assert len(reduced) <= 500
+
+
+def test_downsample_sales_applies_lttb_after_coarsest_granularity():
+    # 300 mois : même le pas mensuel dépasse max_points, LTTB réduit ensuite
+    dates = pd.date_range("2000-01-01", periods=300, freq="MS")
+    sales = pd.DataFrame({"date": dates, "total_price": np.sin(np.arange(300) / 5)})
+    reduced, label = downsample_sales(sales, max_points=100)
+    assert label == "mois"
+    assert len(reduced) == 100
+    kept = reference_lttb(dates.asi8.astype(float).tolist(), sales["total_price"].tolist(), 100)
+    pd.testing.assert_frame_equal(reduced, sales.iloc[kept].reset_index(drop=True))
@@ -0,0 +1,137 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.filters import AGE_BANDS, BitmapIndex, Filters, _clamp
+
+REGIONS = ["Bretagne", "Occitanie", "Île-de-France", "PACA"]
+CATEGORIES = ["Électronique", "Maison", "Fitness"]
+
+
+@pytest.fixture(scope="module")
+def sales():
+    # 1 001 lignes : la dernière tranche de bits est incomplète
+    rng = np.random.default_rng(7)
+    n = 1001
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90 * 24, n), unit="h")
+    df = pd.DataFrame(
+        {
+            "date": dates,
+            "region": rng.choice(REGIONS, n),
+            "category": rng.choice(CATEGORIES, n),
+            "product": rng.choice(["A", "B", "C", "D", "E"], n),
+            "customer_gender": rng.choice(["M", "F"], n),
+            "customer_age": rng.integers(18, 80, n),
+        }
+    )
+    df["category"] = df["category"].astype("category")
+    return df
+
+
+@pytest.fixture(scope="module")
+def index(sales):
+    return BitmapIndex(sales)
+
+
+def brute_force(df: pd.DataFrame, filters: Filters, **equals) -> np.ndarray:
+    keep = pd.Series(True, index=df.index)
+    days = df["date"].dt.date
+    if filters.start is not None:
+        keep &= days >= filters.start
+    if filters.end is not None:
+        keep &= days <= filters.end
+    for field, column in (
+        ("regions", "region"),
+        ("categories", "category"),
+        ("products", "product"),
+        ("genders", "customer_gender"),
+    ):
+        if getattr(filters, field):
+            keep &= df[column].isin(getattr(filters, field))
+    if filters.age_bands:
+        in_band = pd.Series(False, index=df.index)
+        for band in filters.age_bands:
+            low, high = AGE_BANDS[band]
+            in_band |= df["customer_age"].between(low, high)
+        keep &= in_band
+    for column, value in equals.items():
+        if value is not None:
+            keep &= df[column] == value
+    return keep.to_numpy()
+
+
+CASES = [
+    Filters(start=datetime.date(2024, 2, 1)),
+    Filters(end=datetime.date(2024, 1, 15)),
+    Filters(start=datetime.date(2024, 1, 10), end=datetime.date(2024, 1, 10)),
+    Filters(start=datetime.date(2023, 1, 1), end=datetime.date(2025, 1, 1)),
+    Filters(start=datetime.date(2025, 1, 1)),
+    Filters(start=datetime.date(2024, 2, 1), end=datetime.date(2024, 1, 1)),
+    Filters(regions=("Bretagne",)),
+    Filters(regions=("Bretagne", "PACA"), categories=("Maison",)),
+    Filters(products=("A", "E"), genders=("F",)),
+    Filters(age_bands=("18-24", "65+")),
+    Filters(regions=("Inconnue",)),
+    Filters(
+        start=datetime.date(2024, 1, 20),
+        end=datetime.date(2024, 3, 1),
+        regions=("Occitanie", "Île-de-France"),
+        categories=("Électronique", "Fitness"),
+        age_bands=("25-34", "35-44", "45-54"),
+        genders=("M",),
+    ),
+]
+
+
+@pytest.mark.parametrize("filters", CASES)
+def test_mask_matches_pandas(sales, index, filters):
+    expected = brute_force(sales, filters)
+    np.testing.assert_array_equal(index.mask(filters), expected)
+    np.testing.assert_array_equal(index.positions(filters), np.flatnonzero(expected))
+
+
+def test_equality_filters_combine_with_filters(sales, index):
+    filters = Filters(regions=("Bretagne", "PACA"))
+    mask = index.mask(filters, category="Maison", region=None)
+    np.testing.assert_array_equal(mask, brute_force(sales, filters, category="Maison"))
+
+
+def test_no_restriction_returns_none(index):
+    assert index.mask(Filters()) is None
+    assert index.mask(Filters(), region=None) is None
+    assert not Filters().active()
+    assert Filters(genders=("F",)).active()
+
+
+def test_bitmaps_are_packed(sales, index):
+    bitmap = index.bitmaps["region"]["Bretagne"]
+    assert bitmap.dtype == np.uint8
+    assert len(bitmap) == (len(sales) + 7) // 8
+    np.testing.assert_array_equal(
+        np.unpackbits(bitmap, count=len(sales)).astype(bool),
+        (sales["region"] == "Bretagne").to_numpy(),
+    )
+    # Bits de bourrage à zéro
+    assert not np.unpackbits(bitmap)[len(sales) :].any()
+
+
+def test_values_and_date_bounds(sales, index):
+    assert index.values("region") == sorted(REGIONS)
+    assert index.values("category") == sorted(CATEGORIES)
+    assert index.date_bounds() == (sales["date"].min().date(), sales["date"].max().date())
+
+
+def test_empty_frame(sales):
+    index = BitmapIndex(sales.head(0))
+    assert index.date_bounds() is None
+    assert index.mask(Filters(regions=("Bretagne",))).tolist() == []
+
+
+def test_clamp_to_bounds():
+    bounds = (datetime.date(2024, 1, 1), datetime.date(2024, 3, 31))
+    assert _clamp(datetime.date(2023, 6, 1), bounds) == bounds[0]
+    assert _clamp(datetime.date(2025, 6, 1), bounds) == bounds[1]
+    assert _clamp(datetime.date(2024, 2, 1), bounds) == datetime.date(2024, 2, 1)
+    assert _clamp(None, bounds) is None
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import threading
+import time
+
+import pytest
+
+from utils import hashing
+from utils.hashing import HashingPool, HashingRejected, hash_password, needs_rehash, verify_password
+
+PBKDF2 = {"scheme": "pbkdf2-sha256", "iterations": 1000}
+# Paramètres argon2 minimaux : tests rapides
+ARGON2 = {"scheme": "argon2id", "time_cost": 1, "memory_cost": 1024, "parallelism": 1}
+
+
+@pytest.fixture
+def params(tmp_path, monkeypatch):
+    """Write the host parameters file used by hash_password and needs_rehash."""
+    path = tmp_path / "hash_params.json"
+    monkeypatch.setattr(hashing, "PARAMS_FILE", path)
+
+    def write(values: dict) -> dict:
+        path.write_text(json.dumps(values))
+        return values
+
+    return write
+
+
+def test_pbkdf2_format_matches_hashlib(params):
+    params(PBKDF2)
+    stored = hash_password("s3cret")
+    empty, scheme, cost, salt_hex, digest = stored.split("$")
+    assert (empty, scheme, cost) == ("", "pbkdf2-sha256", "i=1000")
+    assert len(bytes.fromhex(salt_hex)) == hashing.SALT_BYTES
+    assert digest == hashlib.pbkdf2_hmac("sha256", b"s3cret", bytes.fromhex(salt_hex), 1000).hex()
+
+
+def test_pbkdf2_salts_differ(params):
+    params(PBKDF2)
+    assert hash_password("s3cret") != hash_password("s3cret")
+
+
+@pytest.mark.parametrize("values", [PBKDF2, ARGON2])
+def test_verify_round_trip(params, values):
+    params(values)
+    stored = hash_password("s3cret")
+    assert verify_password(stored, "s3cret")
+    assert not verify_password(stored, "S3cret")
+
+
+def test_verify_reads_iterations_from_the_hash(params):
+    # Hash créé avec d'autres paramètres que ceux de l'hôte
+    stored = hash_password("s3cret", {"scheme": "pbkdf2-sha256", "iterations": 1234})
+    params(PBKDF2)
+    assert stored.startswith("$pbkdf2-sha256$i=1234$")
+    assert verify_password(stored, "s3cret")
+
+
+def test_verify_legacy_hex_hash_with_separate_salt():
+    salt = "a1b2c3d4e5f60718"
+    digest = hashlib.pbkdf2_hmac(
+        "sha256", b"s3cret", bytes.fromhex(salt), hashing.LEGACY_ITERATIONS
+    ).hex()
+    assert verify_password(digest, "s3cret", legacy_salt=salt)
+    assert not verify_password(digest, "wrong", legacy_salt=salt)
+    assert not verify_password(digest, "s3cret", legacy_salt="00" * 8)
+
+
+def test_verify_rejects_malformed_argon2_hash():
+    assert not verify_password("$argon2id$v=19$m=1024,t=1,p=1$bad", "s3cret")
+
+
+def test_needs_rehash_pbkdf2(params):
+    params(PBKDF2)
+    current = hash_password("s3cret")
+    assert not needs_rehash(current)
+    assert needs_rehash(hash_password("s3cret", {"scheme": "pbkdf2-sha256", "iterations": 999}))
+    # Préfixe commun (i=1000 vs i=10000) : le séparateur compte
+    assert needs_rehash(current.replace("$i=1000$", "$i=10000$"))
+    assert needs_rehash("0123abcd" * 8)
+    assert needs_rehash(hash_password("s3cret", ARGON2))
+
+
+def test_needs_rehash_argon2(params):
+    params(ARGON2)
+    current = hash_password("s3cret")
+    assert not needs_rehash(current)
+    assert needs_rehash(hash_password("s3cret", {**ARGON2, "time_cost": 2}))
+    assert needs_rehash(hash_password("s3cret", PBKDF2))
+    assert needs_rehash("0123abcd" * 8)
+
+
+def test_defaults_without_params_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(hashing, "PARAMS_FILE", tmp_path / "missing.json")
+    assert hashing.load_params() == hashing.DEFAULT_PARAMS
+
+
+def test_pool_rate_limit_per_key():
+    pool = HashingPool(workers=1, queue_limit=4, rate_limit=2, rate_window=60)
+    pool.check_rate("a@x.fr")
+    pool.check_rate("a@x.fr")
+    with pytest.raises(HashingRejected):
+        pool.check_rate("a@x.fr")
+    pool.check_rate("b@x.fr")
+    assert pool.stats["rate_limited"] == 1
+
+
+def test_pool_rejects_beyond_queue_limit():
+    pool = HashingPool(workers=1, queue_limit=1)
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=pool.run, args=(block,))
+    worker.start()
+    started.wait(5)
+    with pytest.raises(HashingRejected):
+        pool.run(lambda: None)
+    release.set()
+    worker.join()
+    # Le créneau est rendu par le callback de fin, après le réveil de l'appelant
+    deadline = time.monotonic() + 5
+    while pool.stats["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.run(lambda: 42) == 42
+    assert pool.stats["rejected_busy"] == 1
@@ -0,0 +1,186 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from utils import incremental
+from utils.cube import build_cube
+from utils.data_loader import CATEGORY_COLUMNS, compact_frame
+from utils.incremental import IncrementalStore
+
+HEADER = "order_id,date,product,category,unit_price,quantity,region,customer_age,customer_gender\n"
+PRODUCTS = (
+    ("Smartphone X", "Électronique", 699.0),
+    ("Chaise Confort", "Maison", 89.5),
+    ("Tapis de Yoga", "Fitness", 25.0),
+    ("Montre Sport", "Accessoires", 149.99),
+)
+REGIONS = ("Bretagne", "Occitanie", "Île-de-France")
+
+
+def rows(first: int, count: int) -> str:
+    lines = []
+    for order_id in range(first, first + count):
+        product, category, price = PRODUCTS[order_id % len(PRODUCTS)]
+        region = REGIONS[order_id % len(REGIONS)]
+        day = pd.Timestamp("2024-01-01") + pd.Timedelta(days=order_id % 40)
+        lines.append(
+            f"{order_id},{day:%Y-%m-%d},{product},{category},{price},{order_id % 3 + 1},"
+            f"{region},{20 + order_id % 50},{'MF'[order_id % 2]}\n"
+        )
+    return "".join(lines)
+
+
+def reference(path) -> pd.DataFrame:
+    df = pd.read_csv(path, parse_dates=["date"])
+    df["total_price"] = df["unit_price"] * df["quantity"]
+    return compact_frame(df)
+
+
+def plain(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def assert_matches_file(store: IncrementalStore, path) -> None:
+    expected = reference(path)
+    pd.testing.assert_frame_equal(plain(store.df), plain(expected), check_dtype=False)
+    for column in CATEGORY_COLUMNS:
+        assert isinstance(store.df[column].dtype, pd.CategoricalDtype)
+    expected_cube = build_cube(expected)
+    assert store.cube.keys() == expected_cube.keys()
+    for dims, level in expected_cube.items():
+        pd.testing.assert_frame_equal(plain(store.cube[dims]), plain(level), check_dtype=False)
+
+
+def age(path, seconds: float = 60) -> None:
+    # Recule la date de modification : le fichier est considéré inactif
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text(HEADER + rows(1000, 50), encoding="utf-8")
+    return path
+
+
+def append(path, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_initial_load_matches_read_csv(csv):
+    store = IncrementalStore(str(csv)).refresh()
+    assert store.offset == csv.stat().st_size
+    assert_matches_file(store, csv)
+
+
+def test_appended_rows_are_parsed_from_the_offset(csv, monkeypatch):
+    store = IncrementalStore(str(csv)).refresh()
+    offset = store.offset
+    parsed = []
+    parse = store._parse
+    monkeypatch.setattr(store, "_parse", lambda data: parsed.append(data) or parse(data))
+
+    append(csv, rows(1050, 7))
+    store.refresh()
+
+    assert parsed == [rows(1050, 7).encode()]
+    assert store.offset == offset + len(rows(1050, 7).encode())
+    assert_matches_file(store, csv)
+
+
+def test_unchanged_file_is_not_reparsed(csv, monkeypatch):
+    store = IncrementalStore(str(csv)).refresh()
+    monkeypatch.setattr(store, "_parse", lambda data: pytest.fail("file re-parsed"))
+    store.refresh()
+
+
+def test_partial_last_line_waits_for_idle_file(csv):
+    store = IncrementalStore(str(csv)).refresh()
+    complete = store.offset
+    partial = rows(1050, 1).rstrip("\n")
+    append(csv, partial)
+
+    store.refresh()
+    assert store.offset == complete
+    assert len(store.df) == 50
+
+    age(csv)
+    store.refresh()
+    assert store.offset == csv.stat().st_size
+    assert_matches_file(store, csv)
+
+    # La suite commence par le saut de ligne manquant
+    append(csv, "\n" + rows(1051, 3))
+    store.refresh()
+    assert store.offset == csv.stat().st_size
+    assert_matches_file(store, csv)
+
+
+def test_extended_partial_line_triggers_full_reload(csv):
+    store = IncrementalStore(str(csv)).refresh()
+    append(csv, "1050,2024-01-02,Montre Sport,Accessoires,14")
+    age(csv)
+    store.refresh()
+    assert len(store.df) == 51
+
+    # La ligne ingérée est prolongée : le prix réel est 149.99
+    append(csv, "9.99,1,Bretagne,30,F\n")
+    store.refresh()
+    assert len(store.df) == 51
+    assert_matches_file(store, csv)
+
+
+def test_rewritten_tail_triggers_full_reload(csv, monkeypatch):
+    store = IncrementalStore(str(csv)).refresh()
+    reloads = []
+    full_reload = store._full_reload
+    monkeypatch.setattr(store, "_full_reload", lambda flush: reloads.append(flush) or full_reload(flush))
+
+    # Dernières lignes réécrites puis fichier prolongé : l'octet de fin ne suffit pas
+    text = csv.read_text(encoding="utf-8").replace(",Bretagne,", ",Normandie,")
+    csv.write_text(text + rows(1050, 5), encoding="utf-8")
+    store.refresh()
+
+    assert len(reloads) == 1
+    assert_matches_file(store, csv)
+
+
+def test_truncated_file_triggers_full_reload(csv):
+    store = IncrementalStore(str(csv)).refresh()
+    csv.write_text(HEADER + rows(1000, 10), encoding="utf-8")
+    store.refresh()
+    assert store.offset == csv.stat().st_size
+    assert_matches_file(store, csv)
+
+
+def test_header_only_file(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text(HEADER, encoding="utf-8")
+    store = IncrementalStore(str(path)).refresh()
+    assert store.df.empty
+    append(path, rows(1000, 4))
+    store.refresh()
+    assert_matches_file(store, path)
+
+
+def test_version_changes_with_ingested_content(csv):
+    store = IncrementalStore(str(csv)).refresh()
+    before = store.version
+    append(csv, rows(1050, 1))
+    assert store.refresh().version != before
+
+
+def test_idle_delay_is_configurable(csv, monkeypatch):
+    monkeypatch.setattr(incremental, "IDLE_SECONDS", 0.0)
+    store = IncrementalStore(str(csv)).refresh()
+    append(csv, rows(1050, 1).rstrip("\n"))
+    store.refresh()
+    assert store.offset == csv.stat().st_size
@@ -0,0 +1,427 @@
+"""Select the aggregation backend used by the pages.
+
+``DASHBOARD_BACKEND=cube`` (default) answers from the precomputed rollup cube,
+``streaming`` builds that cube chunk by chunk with bounded memory, ``duckdb``
+pushes the aggregations down to DuckDB and ``pandas`` works on the
+DataFrame returned by ``load_data``. With ``DASHBOARD_INCREMENTAL=1`` the
+frame and the cube come from the incremental store, which only parses rows
+appended to the CSV since the previous rerun. Without global filters
+(``utils.filters``) the pages read the background KPI snapshot
+(``utils.kpi_snapshot``). Active filters stay on the configured backend when
+it can evaluate them: ``duckdb`` adds them to its WHERE clause, ``cube`` and
+``streaming`` restrict the finest cube level (dates, categories, regions,
+products). Age and gender are not cube dimensions, so with those filters, and
+with ``pandas``, the selection is made on the rows in memory
+(:class:`FilteredBackend`).
+"""
+
+import os
+
+import pandas as pd
+
+from utils import metrics
+from utils.cube import GROUPINGS, cube_total, load_cube, query_cube
+from utils.data_loader import dataset_version, load_data
+from utils.date_index import DateIndex, cube_index, load_date_index
+from utils.filters import BITMAP_COLUMNS, FIELD_COLUMNS, Filters, load_filter_index
+from utils.incremental import get_store
+from utils.instrumentation import timed
+from utils.partitions import INDEXED_COLUMNS, load_partition_index
+from utils.streaming import load_aggregates
+
+BACKEND = os.environ.get("DASHBOARD_BACKEND", "cube").lower()
+INCREMENTAL = os.environ.get("DASHBOARD_INCREMENTAL", "0") == "1"
+KPI_SNAPSHOT = os.environ.get("DASHBOARD_KPI_SNAPSHOT", "1") == "1"
+
+
+# Méthodes chronométrées (span ``metrics.<nom>``) sur les backends de get_backend
+OPERATIONS = (
+    "total_revenue",
+    "average_order_value",
+    "top_products",
+    "sales_by_category",
+    "sales_over_time",
+    "customer_counts",
+    "distinct_values",
+    "order_count",
+)
+
+
+class Backend:
+    """Common base: the data source and its version tag."""
+
+    # Nom du backend (clé des caches partagés entre backends)
+    name = "base"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    def version(self) -> str:
+        return dataset_version(self.path)
+
+    def date_index(self) -> DateIndex:
+        """Prefix-sum date index of the unfiltered data (``utils.date_index``)."""
+        if INCREMENTAL:
+            store = get_store(self.path).refresh()
+            return load_date_index(
+                self.path, "incremental", lambda: cube_index(store.cube), store.version
+            )
+        return load_date_index(self.path)
+
+
+class PandasBackend(Backend):
+    """Aggregations over the in-memory DataFrame."""
+
+    name = "pandas"
+
+    def _df(self, **filters) -> pd.DataFrame:
+        if INCREMENTAL:
+            df = get_store(self.path).refresh().df
+        else:
+            df = load_data(self.path)
+            indexed = {k: v for k, v in filters.items() if k in INDEXED_COLUMNS}
+            positions = load_partition_index(self.path).positions(**indexed)
+            if positions is not None:
+                df = df.iloc[positions]
+            filters = {k: v for k, v in filters.items() if k not in indexed}
+        for column, value in filters.items():
+            if value is not None:
+                df = df[df[column] == value]
+        return df
+
+    def total_revenue(self, **filters) -> float:
+        return metrics.total_revenue(self._df(**filters))
+
+    def average_order_value(self, **filters) -> float:
+        return metrics.average_order_value(self._df(**filters))
+
+    def top_products(self, n: int = 5, **filters) -> pd.DataFrame:
+        return metrics.top_products(self._df(**filters), n)
+
+    def sales_by_category(self, **filters) -> pd.DataFrame:
+        active = {k: v for k, v in filters.items() if v is not None}
+        if not INCREMENTAL and len(active) == 1 and next(iter(active)) in INDEXED_COLUMNS:
+            # Totaux pré-calculés par valeur : simple lookup
+            (column, value), = active.items()
+            return load_partition_index(self.path).sales_by_category(column, value)
+        return metrics.sales_by_category(self._df(**filters))
+
+    def sales_over_time(self, **filters) -> pd.DataFrame:
+        return metrics.sales_over_time(self._df(**filters))
+
+    def customer_counts(self, column: str) -> pd.DataFrame:
+        return metrics.customer_counts(self._df(), column)
+
+    def distinct_values(self, column: str) -> list:
+        return sorted(self._df()[column].unique())
+
+    def order_count(self, **filters) -> int:
+        return len(self._df(**filters))
+
+
+class DuckDBBackend(Backend):
+    """Aggregations executed as SQL by DuckDB over the source file.
+
+    Global ``filters``, when given, are pushed into every query.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, path: str, filters: Filters | None = None):
+        super().__init__(path)
+        # Import différé : duckdb n'est chargé que si ce backend est choisi
+        from utils import duckdb_engine
+
+        self.engine = duckdb_engine
+        self.filters = filters
+
+    @property
+    def version(self) -> str:
+        # Les figures en cache dépendent aussi des filtres
+        version = dataset_version(self.path)
+        return f"{version}|{self.filters!r}" if self.filters is not None else version
+
+    def total_revenue(self, **filters) -> float:
+        return self.engine.total_revenue(self.path, self.filters, **filters)
+
+    def average_order_value(self, **filters) -> float:
+        return self.engine.average_order_value(self.path, self.filters, **filters)
+
+    def top_products(self, n: int = 5, **filters) -> pd.DataFrame:
+        return self.engine.top_products(self.path, n, self.filters, **filters)
+
+    def sales_by_category(self, **filters) -> pd.DataFrame:
+        return self.engine.sales_by_category(self.path, self.filters, **filters)
+
+    def sales_over_time(self, **filters) -> pd.DataFrame:
+        return self.engine.sales_over_time(self.path, self.filters, **filters)
+
+    def customer_counts(self, column: str) -> pd.DataFrame:
+        return self.engine.customer_counts(self.path, column, self.filters)
+
+    def distinct_values(self, column: str) -> list:
+        return self.engine.distinct_values(self.path, column, self.filters)
+
+    def order_count(self, **filters) -> int:
+        return self.engine.order_count(self.path, self.filters, **filters)
+
+    def date_index(self) -> DateIndex:
+        # Agrégat journalier calculé par DuckDB, sans les filtres globaux
+        return load_date_index(
+            self.path, self.name, lambda: DateIndex(*self.engine.daily_totals(self.path))
+        )
+
+
+class CubeBackend(Backend):
+    """Aggregations answered from the rollup cube (cost ~ number of groups)."""
+
+    name = "cube"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.cube = get_store(path).refresh().cube if INCREMENTAL else load_cube(path)
+
+    def total_revenue(self, **filters) -> float:
+        return cube_total(self.cube, "total_price", **filters)
+
+    def average_order_value(self, **filters) -> float:
+        totals = query_cube(self.cube, **filters).iloc[0]
+        return float(totals["total_price"] / totals["orders"]) if totals["orders"] else 0.0
+
+    def top_products(self, n: int = 5, **filters) -> pd.DataFrame:
+        sales = query_cube(self.cube, ("product",), **filters)[["product", "total_price"]]
+        return sales.sort_values("total_price", ascending=False).head(n).reset_index(drop=True)
+
+    def sales_by_category(self, **filters) -> pd.DataFrame:
+        return query_cube(self.cube, ("category",), **filters)[["category", "total_price"]]
+
+    def date_index(self) -> DateIndex:
+        if INCREMENTAL:
+            # Cube du store : index clé sur la version de son contenu
+            return super().date_index()
+        return load_date_index(self.path, self.name, lambda: cube_index(self.cube))
+
+    def sales_over_time(self, **filters) -> pd.DataFrame:
+        active = {k: v for k, v in filters.items() if v is not None}
+        if not INCREMENTAL and set(active) <= {"category", "region"}:
+            index = self.date_index()
+            if index.day_granular:
+                # Série journalière tirée des sommes cumulées (pas de groupby)
+                return index.daily(**active)[["date", "total_price"]]
+        return query_cube(self.cube, ("date",), **filters)[["date", "total_price"]]
+
+    def customer_counts(self, column: str) -> pd.DataFrame:
+        # Mode incrémental : lignes du store, sans reconstruire le snapshot
+        df = get_store(self.path).refresh().df if INCREMENTAL else load_data(self.path, [column])
+        return metrics.customer_counts(df, column)
+
+    def distinct_values(self, column: str) -> list:
+        return sorted(query_cube(self.cube, (column,))[column])
+
+    def order_count(self, **filters) -> int:
+        return int(cube_total(self.cube, "orders", **filters))
+
+
+class StreamingBackend(CubeBackend):
+    """Cube backend fed by the chunked loader (fixed memory budget)."""
+
+    name = "streaming"
+
+    def __init__(self, path: str):
+        Backend.__init__(self, path)
+        self.aggregates = load_aggregates(path)
+        self.cube = self.aggregates["cube"]
+
+    def date_index(self) -> DateIndex:
+        return load_date_index(self.path, self.name, lambda: cube_index(self.cube))
+
+    def customer_counts(self, column: str) -> pd.DataFrame:
+        counts = self.aggregates["counts"][column].sort_values(ascending=False)
+        return counts.rename_axis(column).reset_index(name="count")
+
+
+class FilteredCubeBackend(CubeBackend):
+    """Cube aggregations restricted to dates, categories, regions and products.
+
+    The finest level of the ``source`` cube (date × category × region ×
+    product) is filtered once; every query then groups the remaining cells,
+    so the cost still depends on the number of groups, not of orders.
+    Customer counts need the rows and go through :class:`FilteredBackend`.
+    """
+
+    def __init__(self, source: CubeBackend, filters: Filters):
+        Backend.__init__(self, source.path)
+        self.source = source
+        self.filters = filters
+        base = source.cube[GROUPINGS[0]]
+        keep = pd.Series(True, index=base.index)
+        if filters.start is not None:
+            keep &= base["date"] >= pd.Timestamp(filters.start)
+        if filters.end is not None:
+            keep &= base["date"] < pd.Timestamp(filters.end) + pd.Timedelta(days=1)
+        for field, column in CUBE_FILTERS.items():
+            if getattr(filters, field):
+                keep &= base[column].isin(getattr(filters, field))
+        self.cube = {GROUPINGS[0]: base[keep]}
+
+    @property
+    def version(self) -> str:
+        return f"{dataset_version(self.path)}|{self.filters!r}"
+
+    def date_index(self) -> DateIndex:
+        return self.source.date_index()
+
+    def sales_over_time(self, **filters) -> pd.DataFrame:
+        return query_cube(self.cube, ("date",), **filters)[["date", "total_price"]]
+
+    def customer_counts(self, column: str) -> pd.DataFrame:
+        return FilteredBackend(self.path, self.filters).customer_counts(column)
+
+
+class FilteredBackend(PandasBackend):
+    """Pandas aggregations over the rows selected by the global filters.
+
+    In-memory path, used with the ``pandas`` backend and whenever the filters
+    involve columns the cube does not have (age, gender). Row selection is a
+    bitmap intersection from the filter index; equality
+    filters on indexed columns (e.g. the region pill) join the intersection.
+    Selections made only of dates, categories and regions are answered from
+    the prefix-sum date index without touching the rows.
+    """
+
+    def __init__(self, path: str, filters: Filters):
+        super().__init__(path)
+        self.filters = filters
+        # Sélection réutilisée par les KPIs et graphiques du même rerun
+        self._frames: dict[tuple, pd.DataFrame] = {}
+
+    @property
+    def version(self) -> str:
+        # Les figures en cache dépendent aussi des filtres
+        return f"{dataset_version(self.path)}|{self.filters!r}"
+
+    def _df(self, **filters) -> pd.DataFrame:
+        key = tuple(sorted(filters.items()))
+        if key not in self._frames:
+            self._frames[key] = self._select(**filters)
+        return self._frames[key]
+
+    def _select(self, **filters) -> pd.DataFrame:
+        indexed = {k: v for k, v in filters.items() if k in BITMAP_COLUMNS}
+        if INCREMENTAL:
+            # Index et lignes tirés du même état du store
+            store = get_store(self.path).refresh()
+            df = store.df
+            positions = load_filter_index(self.path, store).positions(self.filters, **indexed)
+        else:
+            df = load_data(self.path)
+            positions = load_filter_index(self.path).positions(self.filters, **indexed)
+        if positions is not None:
+            df = df.iloc[positions]
+        for column, value in filters.items():
+            if column not in indexed and value is not None:
+                df = df[df[column] == value]
+        return df
+
+    def _date_slices(self, **filters) -> dict | None:
+        """Categories/regions to sum in the date index, None if it cannot answer."""
+        selected = self.filters
+        filters = {k: v for k, v in filters.items() if v is not None}
+        if selected.products or selected.age_bands or selected.genders:
+            return None
+        if set(filters) - {"category", "region"}:
+            return None
+        slices = {"category": selected.categories, "region": selected.regions}
+        for column, value in filters.items():
+            # Filtre d'égalité combiné avec la sélection globale (intersection)
+            if slices[column] and value not in slices[column]:
+                return None
+            slices[column] = (value,)
+        return slices
+
+    def _date_totals(self, **filters) -> dict | None:
+        slices = self._date_slices(**filters)
+        if slices is None:
+            return None
+        return self.date_index().totals(self.filters.start, self.filters.end, **slices)
+
+    def total_revenue(self, **filters) -> float:
+        totals = self._date_totals(**filters)
+        return super().total_revenue(**filters) if totals is None else totals["total_price"]
+
+    def average_order_value(self, **filters) -> float:
+        totals = self._date_totals(**filters)
+        if totals is None:
+            return super().average_order_value(**filters)
+        return totals["total_price"] / totals["orders"] if totals["orders"] else 0.0
+
+    def sales_over_time(self, **filters) -> pd.DataFrame:
+        slices = self._date_slices(**filters)
+        if slices is None or not self.date_index().day_granular:
+            return super().sales_over_time(**filters)
+        daily = self.date_index().daily(self.filters.start, self.filters.end, **slices)
+        return daily[["date", "total_price"]]
+
+    def sales_by_category(self, **filters) -> pd.DataFrame:
+        slices = self._date_slices(**filters)
+        if slices is None:
+            return metrics.sales_by_category(self._df(**filters))
+        index = self.date_index()
+        rows = []
+        for category in slices["category"] or index.categories:
+            totals = index.totals(self.filters.start, self.filters.end, category, slices["region"])
+            if totals["orders"]:
+                rows.append((category, totals["total_price"]))
+        return pd.DataFrame(rows, columns=["category", "total_price"])
+
+
+BACKENDS = {
+    "cube": CubeBackend,
+    "streaming": StreamingBackend,
+    "pandas": PandasBackend,
+    "duckdb": DuckDBBackend,
+}
+
+# Champs de Filters qui sont aussi des dimensions du cube
+CUBE_FILTERS = {field: column for field, column in FIELD_COLUMNS.items() if column in GROUPINGS[0]}
+
+
+def _instrument(backend: Backend) -> Backend:
+    # Seul l'appel externe est chronométré : les appels internes (super(),
+    # repli du snapshot sur le backend live) ne sont pas comptés deux fois
+    for name in OPERATIONS:
+        setattr(backend, name, timed(f"metrics.{name}")(getattr(backend, name)))
+    return backend
+
+
+def _filtered_backend(path: str, name: str, filters: Filters) -> Backend:
+    if name == "duckdb":
+        return DuckDBBackend(path, filters)
+    if name in ("cube", "streaming") and not (filters.age_bands or filters.genders):
+        return FilteredCubeBackend(BACKENDS[name](path), filters)
+    return FilteredBackend(path, filters)
+
+
+def get_backend(path: str, name: str | None = None, filters: Filters | None = None):
+    """Return the configured aggregation backend for ``path``.
+
+    Active global ``filters`` are applied by the configured backend when it
+    supports them, by :class:`FilteredBackend` otherwise; without filters nor
+    an explicit ``name`` the pages read the precomputed KPI snapshot. Each
+    operation of the returned backend is timed as span ``metrics.<name>``.
+    """
+    if filters is not None and filters.active():
+        name = (name or BACKEND).lower()
+        if name not in BACKENDS:
+            raise ValueError(f"Backend inconnu : {name}")
+        return _instrument(_filtered_backend(path, name, filters))
+    if name is None and KPI_SNAPSHOT:
+        # Import différé : kpi_snapshot dépend de ce module
+        from utils.kpi_snapshot import SnapshotBackend, get_kpi_publisher
+
+        return _instrument(SnapshotBackend(path, get_kpi_publisher(path).current))
+    name = (name or BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Backend inconnu : {name}")
+    return _instrument(BACKENDS[name](path))
@@ -0,0 +1,260 @@
+"""Authentication flow shared by every storage backend.
+
+``AUTH_BACKEND`` picks the module implementing the storage primitives of
+:class:`AuthBackend`: ``supabase`` (default), ``duckdb`` or ``sqlite``
+(in-memory, for local runs). Hashing, rate limiting, sessions, the login
+form and ``require_login`` live here once; pages only import from this
+module, so switching backend needs no page change.
+"""
+
+import datetime
+import importlib
+import logging
+import os
+import secrets
+from typing import Protocol
+
+import streamlit as st
+
+from utils import hashing
+from utils.hashing import HashingRejected, get_hashing_pool
+from utils.instrumentation import span
+from utils.session_cache import get_session_cache
+from utils.session_reaper import start_reaper
+
+AUTH_BACKEND = os.environ.get("AUTH_BACKEND", "supabase").lower()
+# Utilisateurs ayant accès aux pages d'administration (ids séparés par des virgules)
+ADMIN_USER_IDS = {
+    int(uid) for uid in os.environ.get("ADMIN_USER_IDS", "").split(",") if uid.strip()
+}
+TOKEN_BYTES = 32
+SESSION_DURATION_HOURS = 24 * 7  # 7 jours
+
+BACKENDS = {
+    "supabase": "utils.auth_supabase",
+    "duckdb": "utils.auth_duckdb",
+    "sqlite": "utils.auth_sqlite",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class AuthBackend(Protocol):
+    """Storage primitives implemented by each authentication module."""
+
+    def init_db(self) -> None: ...
+
+    def get_user_by_email(self, email: str) -> dict | None: ...
+
+    def insert_user(self, email: str, username: str, password_hash: str) -> dict | None: ...
+
+    def update_password_hash(self, user_id: int, password_hash: str) -> None: ...
+
+    def insert_session(self, session: dict) -> None: ...
+
+    def select_session(self, token: str) -> dict | None: ...
+
+    def delete_session(self, token: str) -> None: ...
+
+    def latest_session(self) -> dict | None: ...
+
+    def purge_expired_sessions(self, batch_size: int = 1000) -> int: ...
+
+
+def get_auth(name: str | None = None) -> AuthBackend:
+    """Import (lazily) and return the storage module of backend ``name``."""
+    name = (name or AUTH_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Backend d'authentification inconnu : {name}")
+    return importlib.import_module(BACKENDS[name])
+
+
+def _expires_at(session: dict) -> datetime.datetime:
+    expires_at = session["expires_at"]
+    if isinstance(expires_at, str):
+        expires_at = datetime.datetime.fromisoformat(expires_at)
+    return expires_at
+
+
+@st.cache_resource
+def _start_session_reaper(name: str):
+    # Un seul thread de purge par processus et par backend
+    store = get_auth(name)
+    store.init_db()
+    return start_reaper(store.purge_expired_sessions)
+
+
+class Authenticator:
+    """Users, sessions and Streamlit forms on top of a storage backend."""
+
+    def __init__(self, name: str | None = None):
+        self.name = (name or AUTH_BACKEND).lower()
+        self.store = get_auth(self.name)
+
+    # --- Utilisateurs ---
+    def create_user(self, email: str, username: str, password: str) -> dict | None:
+        get_hashing_pool().check_rate(email.lower())
+        # Format versionné : algorithme et paramètres inclus dans le hash
+        password_hash = hashing.hash_password(password)
+        return self.store.insert_user(email.lower(), username, password_hash)
+
+    def _rehash_if_needed(self, user: dict, password: str) -> None:
+        # Paramètres obsolètes → nouveau hash au format courant
+        if not hashing.needs_rehash(user["password_hash"]):
+            return
+        try:
+            password_hash = hashing.hash_password(password)
+        except HashingRejected:
+            # Pool saturé : mise à niveau reportée, la connexion réussit quand même
+            return
+        try:
+            self.store.update_password_hash(user["id"], password_hash)
+        except Exception:
+            # La connexion ne doit pas échouer à cause de la mise à niveau
+            logger.exception("Échec de la mise à niveau du hash de l'utilisateur %s", user["id"])
+
+    def authenticate_user(self, email: str, password: str) -> dict | None:
+        get_hashing_pool().check_rate(email.lower())
+        user = self.store.get_user_by_email(email)
+        if not user or not hashing.verify_password(
+            user["password_hash"], password, legacy_salt=user["salt"]
+        ):
+            return None
+        self._rehash_if_needed(user, password)
+        return {"id": user["id"], "email": user["email"], "username": user["username"]}
+
+    # --- Sessions ---
+    def create_session(self, user_id: int) -> str:
+        token = secrets.token_urlsafe(TOKEN_BYTES)
+        created_at = datetime.datetime.utcnow()
+        session = {
+            "token": token,
+            "user_id": user_id,
+            "created_at": created_at,
+            "expires_at": created_at + datetime.timedelta(hours=SESSION_DURATION_HOURS),
+        }
+        self.store.insert_session(session)
+        get_session_cache().put(token, session)
+        st.session_state["session_token"] = token
+        st.session_state["user_id"] = user_id
+        return token
+
+    def get_session(self, token: str) -> dict | None:
+        if not token:
+            return None
+        # Session validée récemment → pas d'aller-retour vers la base
+        cached = get_session_cache().get(token)
+        if cached:
+            return cached
+        session = self.store.select_session(token)
+        if not session:
+            return None
+        if datetime.datetime.utcnow() > _expires_at(session):
+            self.delete_session(token)
+            return None
+        get_session_cache().put(token, session)
+        return session
+
+    def delete_session(self, token: str) -> None:
+        if token:
+            get_session_cache().invalidate(token)
+            self.store.delete_session(token)
+        st.session_state.pop("session_token", None)
+        st.session_state.pop("user_id", None)
+
+    def restore_session(self) -> None:
+        if "session_token" in st.session_state:
+            return
+        session = self.store.latest_session()
+        if session and datetime.datetime.utcnow() < _expires_at(session):
+            st.session_state["session_token"] = session["token"]
+            st.session_state["user_id"] = session["user_id"]
+
+    def require_login(self) -> None:
+        _start_session_reaper(self.name)
+        self.restore_session()
+        if not self.get_session(st.session_state.get("session_token")):
+            st.warning("Tu dois te connecter pour accéder à cette page.")
+            st.stop()
+
+    # --- Formulaire Streamlit avec st.form ---
+    def auth_form(self) -> None:
+        self.store.init_db()
+        tab_login, tab_signup = st.tabs(["Connexion", "Créer un compte"])
+
+        with tab_login:
+            st.subheader("Connexion")
+            with st.form("login_form", clear_on_submit=False):
+                email = st.text_input("Email")
+                password = st.text_input("Mot de passe", type="password")
+                submitted = st.form_submit_button("Se connecter")
+                if submitted:
+                    try:
+                        user = self.authenticate_user(email, password)
+                    except HashingRejected as e:
+                        st.error(str(e))
+                    else:
+                        if user:
+                            self.create_session(user["id"])
+                            st.success(f"Connecté en tant que {user['username']}")
+                            st.rerun()
+                        else:
+                            st.error("Email ou mot de passe incorrect.")
+
+        with tab_signup:
+            st.subheader("Créer un compte")
+            with st.form("signup_form", clear_on_submit=True):
+                email = st.text_input("Email")
+                username = st.text_input("Nom d'utilisateur")
+                password = st.text_input("Mot de passe", type="password")
+                password2 = st.text_input("Confirmer mot de passe", type="password")
+                submitted = st.form_submit_button("Créer un compte")
+                if submitted:
+                    if not email or not username or not password:
+                        st.error("Remplis tous les champs.")
+                    elif password != password2:
+                        st.error("Les mots de passe ne correspondent pas.")
+                    elif self.store.get_user_by_email(email):
+                        st.error("Un compte existe déjà pour cet email.")
+                    else:
+                        try:
+                            user = self.create_user(email, username, password)
+                        except HashingRejected as e:
+                            st.error(str(e))
+                        else:
+                            if user:
+                                st.success("Compte créé ! Connecte-toi maintenant.")
+                                st.rerun()
+                            else:
+                                st.error("Erreur lors de la création du compte.")
+
+
+@st.cache_resource
+def get_authenticator(name: str | None = None) -> Authenticator:
+    """Authenticator of backend ``name`` (``AUTH_BACKEND`` by default)."""
+    return Authenticator(name)
+
+
+def require_login() -> None:
+    with span("require_login"):
+        get_authenticator().require_login()
+
+
+def is_admin() -> bool:
+    return st.session_state.get("user_id") in ADMIN_USER_IDS
+
+
+def require_admin() -> None:
+    """Stop the page unless the logged-in user is listed in ``ADMIN_USER_IDS``."""
+    require_login()
+    if not is_admin():
+        st.error("Accès réservé aux administrateurs.")
+        st.stop()
+
+
+def auth_form() -> None:
+    get_authenticator().auth_form()
+
+
+def delete_session(token: str) -> None:
+    get_authenticator().delete_session(token)
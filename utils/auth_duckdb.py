@@ -1,21 +1,30 @@
 # utils/auth_duckdb_form.py
 import datetime
-import hashlib
+import logging
 import os
-import secrets
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 import duckdb
 
 import streamlit as st
 
+from utils.instrumentation import increment
+
 # --- Paramètres ---
 DB_PATH = Path(__file__).resolve().parents[1] / "data" / "app.db"
-PBKDF2_ITER = 200_000
-HASH_NAME = "sha256"
-SALT_BYTES = 16
-TOKEN_BYTES = 32
-SESSION_DURATION_HOURS = 24 * 7  # 7 jours
+DB_POOL_SIZE = int(os.environ.get("DUCKDB_POOL_SIZE", 8))
+SESSION_BATCH_SIZE = 32
+SESSION_FLUSH_SECONDS = 1.0
+# Écritures ratées avant d'abandonner une session en attente
+SESSION_FLUSH_ATTEMPTS = 3
+INSERT_SESSION_SQL = (
+    "INSERT INTO sessions (token, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)"
+)
+
+logger = logging.getLogger(__name__)
 
 
 # --- Connexion à la base de données ---
@@ -25,63 +34,165 @@ def get_conn():
     return duckdb.connect(database=str(DB_PATH), read_only=False)
 
 
-# --- Initialisation des tables ---
-def init_db():
-    conn = get_conn()
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY,
-            email TEXT UNIQUE,
-            username TEXT,
-            password_hash TEXT,
-            salt TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS sessions (
-            token TEXT PRIMARY KEY,
-            user_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        );
+@st.cache_resource
+def get_pool() -> queue.LifoQueue:
+    # Curseurs indépendants sur la même base : pas de connexion partagée entre threads
+    pool = queue.LifoQueue()
+    for _ in range(DB_POOL_SIZE):
+        pool.put(get_conn().cursor())
+    return pool
+
+
+@contextmanager
+def _db():
+    pool = get_pool()
+    cursor = pool.get()
+    try:
+        yield cursor
+    finally:
+        pool.put(cursor)
+
+
+# --- Écriture groupée des sessions ---
+class SessionWriter:
+    """Buffers session inserts and writes them in batches (executemany).
+
+    A flush never raises: it often runs on the timer thread or inside another
+    user's session lookup. Rows of a failed batch are retried one by one,
+    the failing ones are re-queued and dropped (logged and counted as
+    ``sessions.dropped``) after ``SESSION_FLUSH_ATTEMPTS`` flushes.
     """
-    )
 
+    def __init__(self):
+        # (ligne, nombre d'écritures déjà ratées)
+        self._pending: list[tuple[list, int]] = []
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
 
-# --- Hachage et gestion utilisateur ---
-def _hash_password(password: str, salt: bytes) -> str:
-    return hashlib.pbkdf2_hmac(HASH_NAME, password.encode(), salt, PBKDF2_ITER).hex()
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(SESSION_FLUSH_SECONDS, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
 
+    def add(self, row: list) -> None:
+        with self._lock:
+            self._pending.append((row, 0))
+            full = len(self._pending) >= SESSION_BATCH_SIZE
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
 
-def create_user(email: str, username: str, password: str):
-    conn = get_conn()
-    max_id = conn.execute("SELECT MAX(id) FROM users").fetchone()[0] or 0
-    salt = os.urandom(SALT_BYTES)
-    password_hash = _hash_password(password, salt)
-    try:
+    def _write(self, pending: list[tuple[list, int]]) -> list[tuple[list, int]]:
+        """Insert the rows; returns those that could not be written."""
+        try:
+            with _db() as conn:
+                # Transaction : un lot raté n'insère aucune ligne
+                conn.begin()
+                try:
+                    conn.executemany(INSERT_SESSION_SQL, [row for row, _ in pending])
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            return []
+        except Exception:
+            logger.exception("Échec de l'écriture groupée de %d sessions", len(pending))
+        failed = []
+        for row, attempts in pending:
+            try:
+                with _db() as conn:
+                    conn.execute(INSERT_SESSION_SQL, row)
+            except Exception:
+                failed.append((row, attempts + 1))
+        return failed
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not pending:
+                return
+            failed = self._write(pending)
+            retry = [(row, attempts) for row, attempts in failed if attempts < SESSION_FLUSH_ATTEMPTS]
+            dropped = len(failed) - len(retry)
+            if dropped:
+                increment("sessions.dropped", dropped)
+                logger.error("%d session(s) abandonnée(s) après %d échecs", dropped, SESSION_FLUSH_ATTEMPTS)
+            if retry:
+                self._pending = retry + self._pending
+                self._schedule()
+
+
+@st.cache_resource
+def get_session_writer() -> SessionWriter:
+    return SessionWriter()
+
+
+# --- Initialisation des tables ---
+def init_db():
+    with _db() as conn:
         conn.execute(
-            "INSERT INTO users (id, email, username, password_hash, salt) VALUES (?, ?, ?, ?, ?)",
-            [max_id + 1, email.lower(), username, password_hash, salt.hex()],
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                email TEXT UNIQUE,
+                username TEXT,
+                password_hash TEXT,
+                salt TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """
         )
-        row = conn.execute(
-            "SELECT id, email, username FROM users WHERE email = ?", [email.lower()]
-        ).fetchone()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                token TEXT PRIMARY KEY,
+                user_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP,
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            );
+        """
+        )
+        # Index pour la purge et la restauration des sessions
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at_idx ON sessions (expires_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_created_at_idx ON sessions (created_at)")
+        # Séquence d'ids (remplace MAX(id) + 1, sujet aux courses)
+        exists = conn.execute(
+            "SELECT COUNT(*) FROM duckdb_sequences() WHERE sequence_name = 'users_id_seq'"
+        ).fetchone()[0]
+        if not exists:
+            start = (conn.execute("SELECT MAX(id) FROM users").fetchone()[0] or 0) + 1
+            conn.execute(f"CREATE SEQUENCE IF NOT EXISTS users_id_seq START {int(start)}")
+
+
+# --- Utilisateurs ---
+def insert_user(email: str, username: str, password_hash: str):
+    try:
+        with _db() as conn:
+            row = conn.execute(
+                """
+                INSERT INTO users (id, email, username, password_hash, salt)
+                VALUES (nextval('users_id_seq'), ?, ?, ?, ?)
+                RETURNING id, email, username
+            """,
+                [email, username, password_hash, ""],
+            ).fetchone()
         return {"id": row[0], "email": row[1], "username": row[2]} if row else None
-    except duckdb.DuckDBException:
+    except duckdb.Error:
         return None
 
 
 def get_user_by_email(email: str):
-    conn = get_conn()
-    row = conn.execute(
-        "SELECT id, email, username, password_hash, salt, created_at FROM users WHERE email = ?",
-        [email.lower()],
-    ).fetchone()
+    with _db() as conn:
+        row = conn.execute(
+            "SELECT id, email, username, password_hash, salt, created_at FROM users WHERE email = ?",
+            [email.lower()],
+        ).fetchone()
     if row:
         return dict(
             zip(["id", "email", "username", "password_hash", "salt", "created_at"], row)
@@ -89,66 +200,41 @@ def get_user_by_email(email: str):
     return None
 
 
-def verify_password(stored_hash: str, salt_hex: str, password: str) -> bool:
-    return secrets.compare_digest(
-        _hash_password(password, bytes.fromhex(salt_hex)), stored_hash
-    )
+def update_password_hash(user_id: int, password_hash: str) -> None:
+    with _db() as conn:
+        conn.execute(
+            "UPDATE users SET password_hash = ?, salt = '' WHERE id = ?",
+            [password_hash, user_id],
+        )
 
 
-def authenticate_user(email: str, password: str):
-    user = get_user_by_email(email)
-    return (
-        {"id": user["id"], "email": user["email"], "username": user["username"]}
-        if user and verify_password(user["password_hash"], user["salt"], password)
-        else None
+# --- Sessions ---
+def insert_session(session: dict) -> None:
+    # Insertion groupée ; le cache de sessions la rend visible immédiatement
+    get_session_writer().add(
+        [session["token"], session["user_id"], session["created_at"], session["expires_at"]]
     )
 
 
-# --- Gestion des sessions ---
-def create_session(user_id: int):
-    token = secrets.token_urlsafe(TOKEN_BYTES)
-    expires_at = datetime.datetime.utcnow() + datetime.timedelta(
-        hours=SESSION_DURATION_HOURS
-    )
-    conn = get_conn()
-    conn.execute(
-        "INSERT INTO sessions (token, user_id, expires_at) VALUES (?, ?, ?)",
-        [token, user_id, expires_at],
-    )
-    st.session_state["session_token"] = token
-    st.session_state["user_id"] = user_id
-    return token
-
-
-def get_session(token: str):
-    conn = get_conn()
-    row = conn.execute(
-        "SELECT token, user_id, created_at, expires_at FROM sessions WHERE token = ?",
-        [token],
-    ).fetchone()
-    if not row:
-        return None
-    expires_at = row[3]
-    if isinstance(expires_at, str):
-        expires_at = datetime.datetime.fromisoformat(expires_at)
-    if datetime.datetime.utcnow() > expires_at:
-        delete_session(token)
-        return None
-    return dict(zip(["token", "user_id", "created_at", "expires_at"], row))
+def select_session(token: str):
+    get_session_writer().flush()
+    with _db() as conn:
+        row = conn.execute(
+            "SELECT token, user_id, created_at, expires_at FROM sessions WHERE token = ?",
+            [token],
+        ).fetchone()
+    return dict(zip(["token", "user_id", "created_at", "expires_at"], row)) if row else None
 
 
-def delete_session(token: str):
-    if not token:
-        return
-    conn = get_conn()
-    conn.execute("DELETE FROM sessions WHERE token = ?", [token])
-    st.session_state.pop("session_token", None)
-    st.session_state.pop("user_id", None)
+def delete_session(token: str) -> None:
+    get_session_writer().flush()
+    with _db() as conn:
+        conn.execute("DELETE FROM sessions WHERE token = ?", [token])
 
 
-def restore_session():
-    if "session_token" not in st.session_state:
-        conn = get_conn()
+def latest_session():
+    get_session_writer().flush()
+    with _db() as conn:
         row = conn.execute(
             """
             SELECT token, user_id, expires_at
@@ -157,58 +243,24 @@ def restore_session():
             ORDER BY created_at DESC LIMIT 1
         """
         ).fetchone()
-        if row:
-            st.session_state["session_token"] = row[0]
-            st.session_state["user_id"] = row[1]
-
-
-def require_login():
-    restore_session()
-    token = st.session_state.get("session_token")
-    if not token or not get_session(token):
-        st.warning("Tu dois te connecter pour accéder à cette page.")
-        st.stop()
-
-
-# --- Formulaire Streamlit avec st.form ---
-def auth_form():
-    init_db()
-    tab_login, tab_signup = st.tabs(["Connexion", "Créer un compte"])
-
-    with tab_login:
-        st.subheader("Connexion")
-        with st.form("login_form", clear_on_submit=False):
-            email = st.text_input("Email")
-            password = st.text_input("Mot de passe", type="password")
-            submitted = st.form_submit_button("Se connecter")
-            if submitted:
-                user = authenticate_user(email, password)
-                if user:
-                    create_session(user["id"])
-                    st.success(f"Connecté en tant que {user['username']}")
-                    st.rerun()
-                else:
-                    st.error("Email ou mot de passe incorrect.")
-
-    with tab_signup:
-        st.subheader("Créer un compte")
-        with st.form("signup_form", clear_on_submit=True):
-            email = st.text_input("Email")
-            username = st.text_input("Nom d'utilisateur")
-            password = st.text_input("Mot de passe", type="password")
-            password2 = st.text_input("Confirmer mot de passe", type="password")
-            submitted = st.form_submit_button("Créer un compte")
-            if submitted:
-                if not email or not username or not password:
-                    st.error("Remplis tous les champs.")
-                elif password != password2:
-                    st.error("Les mots de passe ne correspondent pas.")
-                elif get_user_by_email(email):
-                    st.error("Un compte existe déjà pour cet email.")
-                else:
-                    user = create_user(email, username, password)
-                    if user:
-                        st.success("Compte créé ! Connecte-toi maintenant.")
-                        st.rerun()
-                    else:
-                        st.error("Erreur lors de la création du compte.")
+    return dict(zip(["token", "user_id", "expires_at"], row)) if row else None
+
+
+def purge_expired_sessions(batch_size: int = 1000) -> int:
+    """Delete expired sessions by batches; returns the number deleted."""
+    get_session_writer().flush()
+    deleted = 0
+    while True:
+        with _db() as conn:
+            count = conn.execute(
+                """
+                DELETE FROM sessions WHERE token IN (
+                    SELECT token FROM sessions WHERE expires_at < ? LIMIT ?
+                )
+                RETURNING token
+            """,
+                [datetime.datetime.utcnow(), batch_size],
+            ).fetchall()
+        deleted += len(count)
+        if len(count) < batch_size:
+            return deleted
@@ -0,0 +1,148 @@
+# utils/auth_sqlite.py — backend local (SQLite, en mémoire par défaut)
+import datetime
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import streamlit as st
+
+# --- Paramètres ---
+DB_PATH = os.environ.get("AUTH_SQLITE_PATH", ":memory:")
+
+_lock = threading.Lock()
+
+
+# --- Connexion à la base de données ---
+@st.cache_resource
+def get_conn():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    return conn
+
+
+@contextmanager
+def _db():
+    # sqlite3 : une connexion partagée, accès sérialisé par un verrou
+    with _lock:
+        yield get_conn()
+
+
+# --- Initialisation des tables ---
+@st.cache_resource
+def init_db():
+    with _db() as conn:
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT UNIQUE,
+                username TEXT,
+                password_hash TEXT,
+                salt TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS sessions (
+                token TEXT PRIMARY KEY,
+                user_id INTEGER REFERENCES users(id),
+                created_at TEXT,
+                expires_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS sessions_expires_at_idx ON sessions (expires_at);
+            CREATE INDEX IF NOT EXISTS sessions_created_at_idx ON sessions (created_at);
+        """
+        )
+    return True
+
+
+# --- Utilisateurs ---
+def insert_user(email: str, username: str, password_hash: str):
+    try:
+        with _db() as conn:
+            cur = conn.execute(
+                "INSERT INTO users (email, username, password_hash, salt) VALUES (?, ?, ?, ?)",
+                [email, username, password_hash, ""],
+            )
+        return {"id": cur.lastrowid, "email": email, "username": username}
+    except sqlite3.IntegrityError:
+        return None
+
+
+def get_user_by_email(email: str):
+    with _db() as conn:
+        row = conn.execute(
+            "SELECT id, email, username, password_hash, salt, created_at FROM users WHERE email = ?",
+            [email.lower()],
+        ).fetchone()
+    if row:
+        return dict(
+            zip(["id", "email", "username", "password_hash", "salt", "created_at"], row)
+        )
+    return None
+
+
+def update_password_hash(user_id: int, password_hash: str) -> None:
+    with _db() as conn:
+        conn.execute(
+            "UPDATE users SET password_hash = ?, salt = '' WHERE id = ?",
+            [password_hash, user_id],
+        )
+
+
+# --- Sessions ---
+def insert_session(session: dict) -> None:
+    with _db() as conn:
+        conn.execute(
+            "INSERT INTO sessions (token, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            [
+                session["token"],
+                session["user_id"],
+                session["created_at"].isoformat(),
+                session["expires_at"].isoformat(),
+            ],
+        )
+
+
+def select_session(token: str):
+    with _db() as conn:
+        row = conn.execute(
+            "SELECT token, user_id, created_at, expires_at FROM sessions WHERE token = ?",
+            [token],
+        ).fetchone()
+    return dict(zip(["token", "user_id", "created_at", "expires_at"], row)) if row else None
+
+
+def delete_session(token: str) -> None:
+    with _db() as conn:
+        conn.execute("DELETE FROM sessions WHERE token = ?", [token])
+
+
+def latest_session():
+    with _db() as conn:
+        row = conn.execute(
+            """
+            SELECT token, user_id, expires_at FROM sessions
+            WHERE expires_at > ?
+            ORDER BY created_at DESC LIMIT 1
+        """,
+            [datetime.datetime.utcnow().isoformat()],
+        ).fetchone()
+    return dict(zip(["token", "user_id", "expires_at"], row)) if row else None
+
+
+def purge_expired_sessions(batch_size: int = 1000) -> int:
+    """Delete expired sessions by batches; returns the number deleted."""
+    deleted = 0
+    while True:
+        with _db() as conn:
+            count = conn.execute(
+                """
+                DELETE FROM sessions WHERE token IN (
+                    SELECT token FROM sessions WHERE expires_at < ? LIMIT ?
+                )
+            """,
+                [datetime.datetime.utcnow().isoformat(), batch_size],
+            ).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
@@ -1,43 +1,39 @@
 import datetime
-import secrets
-import hashlib
+import logging
+import os
 import streamlit as st
-from supabase import create_client
+
+logger = logging.getLogger(__name__)
 
 # ============================================================
 #               SUPABASE (CACHÉ POUR PERFORMANCE)
 # ============================================================
+# Client créé au premier appel (et non à l'import) : l'écran de connexion
+# ne paie ni l'import du SDK ni l'initialisation réseau avant d'en avoir besoin.
 @st.cache_resource
 def get_supabase_client():
+    # Substitut local (tests, benchmarks) : SUPABASE_LOCAL=1
+    if os.environ.get("SUPABASE_LOCAL") == "1":
+        from utils.postgrest_local import LocalSupabaseClient
+
+        return LocalSupabaseClient()
     url = st.secrets["supabase"]["url"]
     key = st.secrets["supabase"]["service_role_key"]
-    return create_client(url, key)
-
-supabase = get_supabase_client()
-
-# Sécurité hash
-PBKDF2_ITER = 200_000
-HASH_NAME = "sha256"
+    from supabase import create_client
 
-
-# ============================================================
-#                         HASH PASSWORDS
-# ============================================================
-def _hash_password(password: str, salt: str) -> str:
-    return hashlib.pbkdf2_hmac(
-        HASH_NAME, password.encode(), bytes.fromhex(salt), PBKDF2_ITER
-    ).hex()
+    return create_client(url, key)
 
 
-def verify_password(stored_hash: str, salt_hex: str, password: str) -> bool:
-    return secrets.compare_digest(_hash_password(password, salt_hex), stored_hash)
+def init_db():
+    # Tables et index gérés dans Supabase (cf. sql/supabase_sessions.sql)
+    return True
 
 
 # ============================================================
 #                    UTILISATEURS
 # ============================================================
 def get_user_by_email(email: str):
-    res = supabase.table("users") \
+    res = get_supabase_client().table("users") \
         .select("*") \
         .eq("email", email.lower()) \
         .execute()
@@ -47,167 +43,89 @@ def get_user_by_email(email: str):
     return None
 
 
-def create_user(email: str, username: str, password: str):
+def insert_user(email: str, username: str, password_hash: str):
     """Crée un utilisateur Supabase (id AUTO-GÉNÉRÉ)."""
 
     # empêcher les doublons
     if get_user_by_email(email):
-        st.error("Un compte existe déjà avec cet email.")
         return None
 
-    # hash
-    salt = secrets.token_hex(16)
-    password_hash = _hash_password(password, salt)
-
     user_dict = {
-        "email": email.lower(),
+        "email": email,
         "username": username,
         "password_hash": password_hash,
-        "salt": salt,
+        "salt": "",
         "created_at": datetime.datetime.utcnow().isoformat(),
     }
 
     try:
-        res = supabase.table("users").insert(user_dict).execute()
+        res = get_supabase_client().table("users").insert(user_dict).execute()
 
         # APIResponse n'a PAS status_code → on vérifie data
         if not res.data:
-            st.error("Erreur : l'API Supabase n’a rien renvoyé.")
+            logger.error("L'API Supabase n’a rien renvoyé pour %s", email)
             return None
 
         # récupère l'utilisateur avec l'id auto-incrémenté
-        return get_user_by_email(email)
+        user = get_user_by_email(email)
+        return {"id": user["id"], "email": user["email"], "username": user["username"]} if user else None
 
-    except Exception as e:
-        st.error(f"Erreur Supabase: {e}")
+    except Exception:
+        logger.exception("Erreur Supabase lors de la création de %s", email)
         return None
 
 
-def authenticate_user(email: str, password: str):
-    user = get_user_by_email(email)
-    if user and verify_password(user["password_hash"], user["salt"], password):
-        return user
-    return None
+def update_password_hash(user_id: int, password_hash: str) -> None:
+    get_supabase_client().table("users") \
+        .update({"password_hash": password_hash, "salt": ""}) \
+        .eq("id", user_id) \
+        .execute()
 
 
 # ============================================================
 #                    SESSIONS
 # ============================================================
-SESSION_DURATION_HOURS = 24 * 7  # 7 jours
-
-def create_session(user_id: int):
-    token = secrets.token_urlsafe(32)
-    expires_at = datetime.datetime.utcnow() + datetime.timedelta(hours=SESSION_DURATION_HOURS)
-
-    session = {
-        "token": token,
-        "user_id": user_id,
-        "created_at": datetime.datetime.utcnow().isoformat(),
-        "expires_at": expires_at.isoformat(),
-    }
-
-    supabase.table("sessions").insert(session).execute()
-
-    st.session_state["session_token"] = token
-    st.session_state["user_id"] = user_id
+def insert_session(session: dict) -> None:
+    get_supabase_client().table("sessions").insert(
+        {
+            **session,
+            "created_at": session["created_at"].isoformat(),
+            "expires_at": session["expires_at"].isoformat(),
+        }
+    ).execute()
 
-    return token
 
-
-def get_session(token: str):
-    if not token:
-        return None
-
-    res = supabase.table("sessions").select("*").eq("token", token).execute()
-
-    if not res.data:
-        return None
-
-    session = res.data[0]
-    expires_at = datetime.datetime.fromisoformat(session["expires_at"])
-
-    if datetime.datetime.utcnow() > expires_at:
-        delete_session(token)
-        return None
-
-    return session
+def select_session(token: str):
+    res = get_supabase_client().table("sessions").select("*").eq("token", token).execute()
+    return res.data[0] if res.data else None
 
 
-def delete_session(token: str):
-    if token:
-        supabase.table("sessions").delete().eq("token", token).execute()
-    st.session_state.pop("session_token", None)
-    st.session_state.pop("user_id", None)
+def delete_session(token: str) -> None:
+    get_supabase_client().table("sessions").delete().eq("token", token).execute()
 
 
-def restore_session():
-    if "session_token" not in st.session_state:
-        res = supabase.table("sessions") \
-            .select("*") \
-            .order("created_at", desc=True) \
-            .limit(1) \
+def latest_session():
+    res = get_supabase_client().table("sessions") \
+        .select("*") \
+        .order("created_at", desc=True) \
+        .limit(1) \
+        .execute()
+    return res.data[0] if res.data else None
+
+
+def purge_expired_sessions(batch_size: int = 1000) -> int:
+    """Delete expired sessions by batches; returns the number deleted."""
+    deleted = 0
+    while True:
+        now = datetime.datetime.utcnow().isoformat()
+        res = get_supabase_client().table("sessions") \
+            .select("token") \
+            .lt("expires_at", now) \
+            .limit(batch_size) \
             .execute()
-
-        if res.data:
-            session = res.data[0]
-            expires_at = datetime.datetime.fromisoformat(session["expires_at"])
-            if datetime.datetime.utcnow() < expires_at:
-                st.session_state["session_token"] = session["token"]
-                st.session_state["user_id"] = session["user_id"]
-
-
-def require_login():
-    restore_session()
-    token = st.session_state.get("session_token")
-    if not token or not get_session(token):
-        st.warning("Tu dois te connecter pour accéder à cette page.")
-        st.stop()
-
-
-# ============================================================
-#                  FORMULAIRES STREAMLIT
-# ============================================================
-def auth_form():
-    tab_login, tab_signup = st.tabs(["Connexion", "Créer un compte"])
-
-    # -----------------------------
-    # Connexion
-    # -----------------------------
-    with tab_login:
-        st.subheader("Connexion")
-        with st.form("login_form"):
-            email = st.text_input("Email")
-            password = st.text_input("Mot de passe", type="password")
-            submitted = st.form_submit_button("Se connecter")
-
-            if submitted:
-                user = authenticate_user(email, password)
-                if user:
-                    create_session(user["id"])
-                    st.success(f"Connecté en tant que {user['username']}")
-                    st.rerun()
-                else:
-                    st.error("Email ou mot de passe incorrect.")
-
-    # -----------------------------
-    # Création de compte
-    # -----------------------------
-    with tab_signup:
-        st.subheader("Créer un compte")
-        with st.form("signup_form"):
-            email = st.text_input("Email")
-            username = st.text_input("Nom d’utilisateur")
-            password = st.text_input("Mot de passe", type="password")
-            password2 = st.text_input("Confirmer mot de passe", type="password")
-            submitted = st.form_submit_button("Créer un compte")
-
-            if submitted:
-                if not email or not username or not password:
-                    st.error("Remplis tous les champs.")
-                elif password != password2:
-                    st.error("Les mots de passe ne correspondent pas.")
-                else:
-                    user = create_user(email, username, password)
-                    if user:
-                        st.success("Compte créé ! Connecte-toi maintenant.")
-                        st.rerun()
+        tokens = [row["token"] for row in res.data or []]
+        if tokens:
+            get_supabase_client().table("sessions").delete().in_("token", tokens).execute()
+        deleted += len(tokens)
+        if len(tokens) < batch_size:
+            return deleted
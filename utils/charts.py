@@ -1,17 +1,30 @@
 """Plotly charts for Streamlit dashboard."""
 
+from __future__ import annotations
 
+from typing import TYPE_CHECKING
 
 import pandas as pd
-import plotly.express as px
 
 import streamlit as st
 
+from utils.downsampling import downsample_sales
+from utils.figure_cache import get_figure_cache
+from utils.instrumentation import span
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
 COLOR_SEQ = ["#0d6efd", "#06b6d4", "#f59e0b", "#10b981", "#6366f1"]
+# Au-delà, marqueurs et spline coûtent cher au navigateur
+SMOOTH_MAX_POINTS = 200
+
 
+def sales_by_category_figure(sales: pd.DataFrame) -> go.Figure:
+    """Bar chart from pre-aggregated ``category, total_price`` rows."""
+    # plotly.express n'est importé qu'à la première construction (cache miss)
+    import plotly.express as px
 
-def plot_sales_by_category(df: pd.DataFrame) -> None:
-    sales = df.groupby("category")["total_price"].sum().reset_index()
     fig = px.bar(
         sales,
         x="category",
@@ -39,19 +52,22 @@ def plot_sales_by_category(df: pd.DataFrame) -> None:
             bordercolor="black",
         ),
     )
+    return fig
 
-    st.plotly_chart(fig, use_container_width=True)
 
+def sales_over_time_figure(sales_time: pd.DataFrame) -> go.Figure:
+    """Line chart from pre-aggregated ``date, total_price`` rows (downsampled)."""
+    import plotly.express as px
 
-def plot_sales_over_time(df: pd.DataFrame) -> None:
-    sales_time = df.groupby("date")["total_price"].sum().reset_index()
+    sales_time, granularity = downsample_sales(sales_time)
+    smooth = len(sales_time) <= SMOOTH_MAX_POINTS
     fig = px.line(
         sales_time,
         x="date",
         y="total_price",
         title="Ventes dans le temps",
-        markers=True,
-        line_shape="spline",
+        markers=smooth,
+        line_shape="spline" if smooth else "linear",
         color_discrete_sequence=["#0d6efd"],
     )
     fig.update_layout(
@@ -59,6 +75,34 @@ def plot_sales_over_time(df: pd.DataFrame) -> None:
         paper_bgcolor="#cce7ff",
         font_color="#212529",
         xaxis_title="Date",
-        yaxis_title="CA (€)",
+        yaxis_title=f"CA (€) par {granularity}" if granularity else "CA (€)",
+    )
+    return fig
+
+
+def _show_cached(chart_id: str, backend, build, filters: dict) -> None:
+    key = (backend.version, chart_id, tuple(sorted(filters.items())))
+    fig = get_figure_cache().get_or_build(key, build)
+    # Sérialisation JSON et envoi de la figure au navigateur
+    with span("figure.render"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def show_sales_by_category(backend, **filters) -> None:
+    """Category chart served from the figure cache (built on a miss only)."""
+    _show_cached(
+        "sales_by_category",
+        backend,
+        lambda: sales_by_category_figure(backend.sales_by_category(**filters)),
+        filters,
+    )
+
+
+def show_sales_over_time(backend, **filters) -> None:
+    """Time-series chart served from the figure cache (built on a miss only)."""
+    _show_cached(
+        "sales_over_time",
+        backend,
+        lambda: sales_over_time_figure(backend.sales_over_time(**filters)),
+        filters,
     )
-    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,111 @@
+"""Materialized rollup cube over date × category × region × product.
+
+The cube stores partial aggregates (revenue, quantity, order count) at several
+grouping levels. Queries are answered from the smallest level that covers the
+requested dimensions, so their cost depends on the number of groups rather
+than on the number of orders.
+"""
+
+import pandas as pd
+
+import streamlit as st
+
+from utils.data_loader import dataset_version, load_data
+from utils.instrumentation import cache_lookup, cache_miss
+
+DIMENSIONS = ("date", "category", "region", "product")
+MEASURES = ("total_price", "quantity", "orders")
+
+# Niveaux d'agrégation matérialisés (le premier est le grain le plus fin)
+GROUPINGS = (
+    ("date", "category", "region", "product"),
+    ("date", "category", "region"),
+    ("category", "region", "product"),
+    ("category", "region"),
+    ("date",),
+    ("category",),
+    ("region",),
+    ("product",),
+    (),
+)
+
+
+def build_cube(df: pd.DataFrame) -> dict[tuple[str, ...], pd.DataFrame]:
+    """Compute every grouping level, each one from the finest level."""
+    base = (
+        df.groupby(list(GROUPINGS[0]), observed=True)
+        .agg(
+            total_price=("total_price", "sum"),
+            quantity=("quantity", "sum"),
+            orders=("total_price", "size"),
+        )
+        .reset_index()
+    )
+    cube = {GROUPINGS[0]: base}
+    for dims in GROUPINGS[1:]:
+        if dims:
+            level = base.groupby(list(dims), observed=True)[list(MEASURES)].sum().reset_index()
+        else:
+            level = base[list(MEASURES)].sum().to_frame().T
+        cube[dims] = level
+    return cube
+
+
+@st.cache_data
+@cache_miss("cube")
+def _load_cube(path: str, version: str) -> dict[tuple[str, ...], pd.DataFrame]:
+    return build_cube(load_data(path))
+
+
+@cache_lookup("cube")
+def load_cube(path: str) -> dict[tuple[str, ...], pd.DataFrame]:
+    """Cube of ``path``, rebuilt once per dataset version."""
+    return _load_cube(path, dataset_version(path))
+
+
+def _pick_level(cube: dict, needed: set[str]) -> pd.DataFrame:
+    candidates = [dims for dims in cube if needed.issubset(dims)]
+    if not candidates:
+        raise ValueError(f"Dimensions inconnues : {sorted(needed - set(DIMENSIONS))}")
+    return cube[min(candidates, key=lambda dims: len(cube[dims]))]
+
+
+def query_cube(cube: dict, by: tuple[str, ...] = (), **filters) -> pd.DataFrame:
+    """Aggregate the measures by ``by`` dimensions, with equality filters."""
+    filters = {k: v for k, v in filters.items() if v is not None}
+    level = _pick_level(cube, set(by) | set(filters))
+    for column, value in filters.items():
+        level = level[level[column] == value]
+    if not by:
+        return level[list(MEASURES)].sum().to_frame().T
+    return level.groupby(list(by), observed=True)[list(MEASURES)].sum().reset_index()
+
+
+def cube_total(cube: dict, measure: str = "total_price", **filters) -> float:
+    return float(query_cube(cube, **filters)[measure].iloc[0])
+
+
+def _align(level: pd.DataFrame, delta: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Mêmes catégories des deux côtés : concat et groupby restent sur les codes
+    for column in level.columns.intersection(DIMENSIONS):
+        left, right = level[column], delta[column]
+        if isinstance(left.dtype, pd.CategoricalDtype) and isinstance(right.dtype, pd.CategoricalDtype):
+            if not left.cat.categories.equals(right.cat.categories):
+                categories = left.cat.categories.union(right.cat.categories)
+                level = level.assign(**{column: left.cat.set_categories(categories)})
+                delta = delta.assign(**{column: right.cat.set_categories(categories)})
+        elif left.dtype != right.dtype:
+            delta = delta.assign(**{column: right.astype(left.dtype)})
+    return level, delta
+
+
+def merge_cubes(cube: dict, delta: dict) -> dict[tuple[str, ...], pd.DataFrame]:
+    """Add the partial aggregates of ``delta`` into ``cube`` level by level."""
+    merged = {}
+    for dims, level in cube.items():
+        both = pd.concat(_align(level, delta[dims]), ignore_index=True)
+        if dims:
+            merged[dims] = both.groupby(list(dims), observed=True)[list(MEASURES)].sum().reset_index()
+        else:
+            merged[dims] = both[list(MEASURES)].sum().to_frame().T
+    return merged
@@ -1,14 +1,226 @@
 """Load and preprocess e-commerce sales data."""
 
+import hashlib
+import json
+import os
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 import streamlit as st
 
+from utils.instrumentation import cache_miss, increment, timed
 
-@st.cache_data
-def load_data(path: str) -> pd.DataFrame:
-    """Load CSV and compute total price."""
+# Snapshots Parquet générés à partir des CSV sources
+SNAPSHOT_DIR = Path(__file__).resolve().parents[1] / "data" / ".snapshots"
+HASH_CHUNK_BYTES = 1 << 20
+# À incrémenter quand le contenu du snapshot change (force la reconstruction)
+SNAPSHOT_FORMAT = 3
+
+# Copie Arrow IPC du snapshot, mappée en mémoire et partagée entre processus
+SHARED_CACHE = os.environ.get("DASHBOARD_SHARED_CACHE", "1") == "1"
+
+# Encodage compact des colonnes (faible cardinalité / petites valeurs)
+CATEGORY_COLUMNS = ("product", "category", "region", "customer_gender")
+SMALL_INT_COLUMNS = {"customer_age": "uint8", "quantity": "uint16"}
+
+
+def _narrow(series: pd.Series, dtype: str) -> pd.Series:
+    info = np.iinfo(dtype)
+    if series.min() >= info.min and series.max() <= info.max:
+        return series.astype(dtype)
+    return series
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Dictionary-encode string columns and downcast the small integer columns.
+
+    Prices stay as read (float64 for cents): float32 loses cents on large totals.
+    """
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype("category")
+    for column, dtype in SMALL_INT_COLUMNS.items():
+        if pd.api.types.is_integer_dtype(df[column]):
+            df[column] = _narrow(df[column], dtype)
+    df["order_id"] = pd.to_numeric(df["order_id"], downcast="unsigned")
+    return df
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Memory used by each column (bytes), largest first."""
+    usage = df.memory_usage(index=False, deep=True)
+    return (
+        pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": usage})
+        .rename_axis("column")
+        .sort_values("bytes", ascending=False)
+        .reset_index()
+    )
+
+
+def _read_source(path: Path) -> pd.DataFrame:
+    """Parse the CSV source, compute total price and compact the columns."""
     df: pd.DataFrame = pd.read_csv(path, parse_dates=["date"])
     df["total_price"] = df["unit_price"] * df["quantity"]
-    return df
+    return compact_frame(df)
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(path: Path, stat: os.stat_result, sha256: str) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(
+        json.dumps(
+            {
+                "format": SNAPSHOT_FORMAT,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": sha256,
+            }
+        )
+    )
+    os.replace(tmp, path)
+
+
+def snapshot_path(path: str) -> Path:
+    """Location of the Parquet snapshot built for ``path``."""
+    src = Path(path).resolve()
+    key = hashlib.sha1(str(src).encode()).hexdigest()[:8]
+    return SNAPSHOT_DIR / f"{src.stem}-{key}.parquet"
+
+
+def dataset_version(path: str) -> str:
+    """Cheap version tag of the source file (mtime + size)."""
+    stat = Path(path).stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def snapshot_is_fresh(path: str) -> bool:
+    """True if the snapshot of ``path`` matches the current source mtime/size."""
+    stat = Path(path).stat()
+    snap = snapshot_path(path)
+    manifest = _read_manifest(snap.with_suffix(".json"))
+    if manifest and manifest.get("format") != SNAPSHOT_FORMAT:
+        manifest = None
+    return (
+        snap.exists()
+        and manifest is not None
+        and manifest["mtime_ns"] == stat.st_mtime_ns
+        and manifest["size"] == stat.st_size
+    )
+
+
+def ensure_snapshot(path: str) -> Path:
+    """Build the Parquet snapshot of ``path`` if it is missing or stale.
+
+    The snapshot is reused as long as the source mtime/size are unchanged;
+    otherwise the content hash decides whether a rebuild is needed.
+    """
+    src = Path(path)
+    stat = src.stat()
+    snap = snapshot_path(path)
+    manifest_path = snap.with_suffix(".json")
+    manifest = _read_manifest(manifest_path)
+    if manifest and manifest.get("format") != SNAPSHOT_FORMAT:
+        manifest = None
+
+    if snap.exists() and manifest:
+        if manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+            return snap
+        digest = _file_hash(src)
+        if manifest["sha256"] == digest:
+            # Fichier "touché" sans modification du contenu
+            _write_manifest(manifest_path, stat, digest)
+            return snap
+    else:
+        digest = _file_hash(src)
+
+    df = _read_source(src)
+    snap.parent.mkdir(parents=True, exist_ok=True)
+    tmp = snap.with_name(f"{snap.name}.{os.getpid()}.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, snap)
+    _write_manifest(manifest_path, stat, digest)
+    return snap
+
+
+def shared_path(path: str) -> Path:
+    """Arrow IPC file of the current version of ``path``."""
+    snap = snapshot_path(path)
+    return snap.with_name(f"{snap.stem}-{dataset_version(path)}-{SNAPSHOT_FORMAT}.arrow")
+
+
+def ensure_shared(path: str) -> Path:
+    """Publish the snapshot of ``path`` as an uncompressed Arrow IPC file.
+
+    Written once (atomic rename) and memory-mapped by every server process;
+    files of previous versions are removed (processes still mapping them keep
+    their pages until they remap).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    target = shared_path(path)
+    if target.exists():
+        return target
+    # Un seul bloc contigu par colonne : la conversion pandas reste sans copie
+    table = pq.read_table(ensure_snapshot(path)).combine_chunks()
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp, target)
+    for stale in target.parent.glob(f"{snapshot_path(path).stem}-*.arrow"):
+        if stale != target:
+            stale.unlink(missing_ok=True)
+    return target
+
+
+@st.cache_resource(max_entries=8)
+@cache_miss("shared")
+def _map_shared(path: str, version: str, columns: tuple[str, ...] | None) -> pd.DataFrame:
+    import pyarrow as pa
+
+    source = pa.memory_map(str(ensure_shared(path)))
+    table = pa.ipc.open_file(source).read_all()
+    if columns:
+        table = table.select(list(columns))
+    # Colonnes numériques et codes de catégories : vues en lecture seule sur le fichier mappé
+    return table.to_pandas(split_blocks=True)
+
+
+@st.cache_data
+@cache_miss("snapshot")
+def _load_snapshot(path: str, version: str, columns: tuple[str, ...] | None) -> pd.DataFrame:
+    snap = ensure_snapshot(path)
+    return pd.read_parquet(snap, columns=list(columns) if columns else None)
+
+
+@timed("load_data")
+def load_data(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Load sales data from its snapshot, optionally column-projected.
+
+    With ``DASHBOARD_SHARED_CACHE=1`` (default) the frame is a read-only view
+    on the memory-mapped Arrow file, shared by every caller and every server
+    process; otherwise it is a per-process copy read from Parquet.
+    """
+    version = dataset_version(path)
+    columns = tuple(columns) if columns else None
+    if SHARED_CACHE:
+        increment("cache.shared.lookups")
+        return _map_shared(path, version, columns)
+    increment("cache.snapshot.lookups")
+    return _load_snapshot(path, version, columns)
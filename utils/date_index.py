@@ -0,0 +1,167 @@
+"""Prefix-sum index over a daily calendar for date-range queries.
+
+For every day between the first and the last order the index stores the
+cumulative revenue, quantity and order count, overall and per category,
+region and category × region. The calendar is contiguous, so a date maps to
+a row by subtraction and the total over any range is ``cum[end] - cum[start]``:
+two array lookups whatever the number of orders or the length of the range.
+
+Each backend builds the index from its own daily aggregate (the cube level
+date × category × region, or a DuckDB query), so it never loads the rows of
+a backend that does not need them. Totals over date ranges are exact for any
+source; the per-day series only reproduces ``sales_over_time`` when the
+source dates carry no time of day (``day_granular``).
+"""
+
+import datetime
+import itertools
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+
+import streamlit as st
+
+from utils.cube import MEASURES, load_cube
+from utils.data_loader import dataset_version
+from utils.instrumentation import cache_lookup, cache_miss
+
+ALL = None
+
+
+def _values(selection) -> list:
+    # Une valeur, une liste de valeurs ou None (toutes)
+    if selection is None:
+        return [ALL]
+    if isinstance(selection, str):
+        return [selection]
+    return list(selection) or [ALL]
+
+
+class DateIndex:
+    """Cumulative ``MEASURES`` per day for each (category, region) slice."""
+
+    def __init__(self, daily: pd.DataFrame, day_granular: bool | None = None):
+        dates = pd.to_datetime(daily["date"])
+        if day_granular is None:
+            # Dates sans heure : la série journalière est celle de la source
+            day_granular = bool((dates == dates.dt.normalize()).all())
+        self.day_granular = day_granular
+        days = dates.to_numpy().astype("datetime64[D]")
+        self.first = days.min() if len(days) else np.datetime64("1970-01-01", "D")
+        self.n_days = int((days.max() - self.first).astype(int)) + 1 if len(days) else 0
+        self.calendar = self.first + np.arange(self.n_days)
+        positions = (days - self.first).astype(np.int64)
+        values = daily[list(MEASURES)].to_numpy(dtype=np.float64)
+        categories = daily["category"].astype(str).to_numpy()
+        regions = daily["region"].astype(str).to_numpy()
+        self.categories = sorted(set(categories))
+        self.regions = sorted(set(regions))
+
+        category_codes = np.searchsorted(self.categories, categories)
+        region_codes = np.searchsorted(self.regions, regions)
+
+        # Une série cumulée par tranche ; ligne 0 = avant le premier jour
+        self.cumsums: dict[tuple, np.ndarray] = {}
+        layouts = (
+            ([(ALL, ALL)], np.zeros(len(daily), dtype=np.int64)),
+            ([(c, ALL) for c in self.categories], category_codes),
+            ([(ALL, r) for r in self.regions], region_codes),
+            (
+                list(itertools.product(self.categories, self.regions)),
+                category_codes * len(self.regions) + region_codes,
+            ),
+        )
+        for groups, codes in layouts:
+            sums = np.zeros((len(groups), self.n_days + 1, len(MEASURES)))
+            np.add.at(sums, (codes, positions + 1), values)
+            np.cumsum(sums, axis=1, out=sums)
+            self.cumsums.update(zip(groups, sums))
+
+    def _position(self, day, default: int) -> int:
+        if day is None:
+            return default
+        offset = int((np.datetime64(day, "D") - self.first).astype(int))
+        return min(max(offset, 0), self.n_days)
+
+    def rows(self, start=None, end=None) -> tuple[int, int]:
+        """Rows of the cumulative arrays delimiting ``[start, end]`` (inclusive)."""
+        # Plage inclusive [start, end] → lignes [low, high) du tableau cumulé décalé
+        low = self._position(start, 0)
+        after = None if end is None else np.datetime64(end, "D") + np.timedelta64(1, "D")
+        high = self._position(after, self.n_days)
+        return low, max(low, high)
+
+    def _slices(self, category, region) -> list[np.ndarray]:
+        keys = itertools.product(_values(category), _values(region))
+        return [self.cumsums[key] for key in keys if key in self.cumsums]
+
+    def cumulative(self, category=None, region=None) -> np.ndarray:
+        """Cumulative measures ``(n_days + 1, len(MEASURES))`` of the selected slices."""
+        slices = self._slices(category, region)
+        return sum(slices) if slices else np.zeros((self.n_days + 1, len(MEASURES)))
+
+    def totals(self, start=None, end=None, category=None, region=None) -> dict[str, float]:
+        """Revenue, quantity and order count between ``start`` and ``end`` (inclusive).
+
+        ``category`` and ``region`` take one value or several (union).
+        """
+        low, high = self.rows(start, end)
+        total = np.zeros(len(MEASURES))
+        for cum in self._slices(category, region):
+            total += cum[high] - cum[low]
+        return dict(zip(MEASURES, total.tolist()))
+
+    def daily(self, start=None, end=None, category=None, region=None) -> pd.DataFrame:
+        """Per-day measures over the range (days without orders omitted)."""
+        slices = self._slices(category, region)
+        low, high = self.rows(start, end)
+        cum = sum(cum[low : high + 1] for cum in slices) if slices else None
+        if cum is None or high == low:
+            return pd.DataFrame({"date": pd.to_datetime([]), **{m: [] for m in MEASURES}})
+        values = np.diff(cum, axis=0)
+        frame = pd.DataFrame(values, columns=list(MEASURES))
+        frame.insert(0, "date", pd.to_datetime(self.calendar[low:high]))
+        return frame[frame["orders"] > 0].reset_index(drop=True)
+
+    def compare(
+        self,
+        period: tuple[datetime.date, datetime.date],
+        reference: tuple[datetime.date, datetime.date],
+        measure: str = "total_price",
+        **slice_,
+    ) -> dict[str, float | None]:
+        """``measure`` over ``period`` and ``reference`` with the relative change."""
+        current = self.totals(*period, **slice_)[measure]
+        previous = self.totals(*reference, **slice_)[measure]
+        change = (current - previous) / previous if previous else None
+        return {"current": current, "previous": previous, "change": change}
+
+
+def cube_index(cube: dict) -> DateIndex:
+    return DateIndex(cube[("date", "category", "region")])
+
+
+@st.cache_resource(max_entries=8)
+@cache_miss("date_index")
+def _load_index(
+    path: str, version: str, source: str, _build: Callable[[], DateIndex]
+) -> DateIndex:
+    # _build n'entre pas dans la clé : source la distingue
+    return _build()
+
+
+@cache_lookup("date_index")
+def load_date_index(
+    path: str,
+    source: str = "cube",
+    build: Callable[[], DateIndex] | None = None,
+    version: str | None = None,
+) -> DateIndex:
+    """Date index of ``path`` built by ``source``, once per dataset version.
+
+    ``build`` is only called on a miss; by default the index comes from the
+    cube of ``load_cube``. ``version`` defaults to the file version.
+    """
+    build = build or (lambda: cube_index(load_cube(path)))
+    return _load_index(path, version or dataset_version(path), source, build)
@@ -0,0 +1,86 @@
+"""Bound the number of points sent to the browser for time series.
+
+A coarser granularity (hour, day, week, month) is picked first when the
+span allows it; if a series still has too many points, LTTB keeps the
+points that best preserve its visual shape (peaks and troughs).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = int(os.environ.get("DASHBOARD_MAX_POINTS", 1000))
+
+# Granularités candidates, de la plus fine à la plus grossière
+GRANULARITIES = (
+    ("min", pd.Timedelta(minutes=1), "minute"),
+    ("h", pd.Timedelta(hours=1), "heure"),
+    ("D", pd.Timedelta(days=1), "jour"),
+    ("W", pd.Timedelta(weeks=1), "semaine"),
+    ("MS", pd.Timedelta(days=30), "mois"),
+)
+
+
+def choose_granularity(dates: pd.Series, max_points: int = MAX_POINTS) -> tuple[str, str] | None:
+    """Finest (freq, label) whose bucket count fits ``max_points``, or None."""
+    if len(dates) <= max_points:
+        return None
+    span = dates.max() - dates.min()
+    for freq, step, label in GRANULARITIES:
+        if span / step <= max_points:
+            return freq, label
+    return GRANULARITIES[-1][0], GRANULARITIES[-1][2]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the ``n_out`` points kept by Largest-Triangle-Three-Buckets."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = x.astype("float64")
+    y = y.astype("float64")
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Aire du triangle (point retenu, candidat, moyenne du bucket suivant)
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def downsample_sales(
+    sales_time: pd.DataFrame, max_points: int = MAX_POINTS
+) -> tuple[pd.DataFrame, str | None]:
+    """Resample and/or LTTB-reduce ``date, total_price`` rows to ``max_points``.
+
+    Returns the reduced frame and the label of the granularity used (None when
+    the series is returned at its original resolution).
+    """
+    sales_time = sales_time.sort_values("date")
+    granularity = choose_granularity(sales_time["date"], max_points)
+    label = None
+    if granularity:
+        freq, label = granularity
+        sales_time = (
+            sales_time.groupby(pd.Grouper(key="date", freq=freq))["total_price"]
+            .sum()
+            .reset_index()
+        )
+    if len(sales_time) > max_points:
+        dates = sales_time["date"].to_numpy().astype("datetime64[ns]").astype("int64")
+        kept = lttb(dates, sales_time["total_price"].to_numpy(), max_points)
+        sales_time = sales_time.iloc[kept]
+    return sales_time.reset_index(drop=True), label
@@ -0,0 +1,163 @@
+"""Push KPI and chart aggregations down to DuckDB.
+
+Every function scans the CSV (or its Parquet snapshot) inside DuckDB and only
+returns the aggregated result, so memory use does not grow with the file.
+The global filters (``selection``) are translated into the WHERE clause.
+"""
+
+import duckdb
+import pandas as pd
+
+import streamlit as st
+
+from utils.data_loader import snapshot_is_fresh, snapshot_path
+from utils.filters import AGE_BANDS, FIELD_COLUMNS, Filters
+
+# Colonnes autorisées dans les filtres (évite toute injection SQL)
+FILTER_COLUMNS = {
+    "order_id",
+    "date",
+    "product",
+    "category",
+    "region",
+    "customer_age",
+    "customer_gender",
+}
+
+
+@st.cache_resource
+def get_engine_conn():
+    # Base en mémoire : DuckDB parallélise les scans sur tous les cœurs
+    return duckdb.connect()
+
+
+def _literal(path: str) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _source(path: str) -> str:
+    if path.endswith(".parquet"):
+        return f"read_parquet({_literal(path)})"
+    if snapshot_is_fresh(path):
+        return f"read_parquet({_literal(snapshot_path(path))})"
+    return (
+        "(SELECT *, unit_price * quantity AS total_price "
+        f"FROM read_csv({_literal(path)}, header = true))"
+    )
+
+
+def _selection(selection: Filters | None) -> tuple[list[str], list]:
+    clauses, params = [], []
+    if selection is None:
+        return clauses, params
+    if selection.start is not None:
+        clauses.append("CAST(date AS DATE) >= ?")
+        params.append(selection.start)
+    if selection.end is not None:
+        clauses.append("CAST(date AS DATE) <= ?")
+        params.append(selection.end)
+    for field, column in FIELD_COLUMNS.items():
+        values = getattr(selection, field)
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if selection.age_bands:
+        bands = [AGE_BANDS[band] for band in selection.age_bands]
+        clauses.append("(" + " OR ".join(["customer_age BETWEEN ? AND ?"] * len(bands)) + ")")
+        params.extend(bound for band in bands for bound in band)
+    return clauses, params
+
+
+def _query(
+    path: str, select: str, tail: str = "", selection: Filters | None = None, **filters
+) -> duckdb.DuckDBPyConnection:
+    clauses, params = _selection(selection)
+    for column, value in filters.items():
+        if value is None:
+            continue
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Filtre non supporté : {column}")
+        clauses.append(f"{column} = ?")
+        params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT {select} FROM {_source(path)} {where} {tail}"
+    # Un curseur par appel : la connexion est partagée entre les sessions
+    return get_engine_conn().cursor().execute(sql, params)
+
+
+def total_revenue(path: str, selection: Filters | None = None, **filters) -> float:
+    return float(_query(path, "COALESCE(SUM(total_price), 0)", selection=selection, **filters).fetchone()[0])
+
+
+def average_order_value(path: str, selection: Filters | None = None, **filters) -> float:
+    value = _query(path, "AVG(total_price)", selection=selection, **filters).fetchone()[0]
+    return float(value) if value is not None else 0.0
+
+
+def top_products(
+    path: str, n: int = 5, selection: Filters | None = None, **filters
+) -> pd.DataFrame:
+    return _query(
+        path,
+        "product, SUM(total_price) AS total_price",
+        f"GROUP BY product ORDER BY total_price DESC LIMIT {int(n)}",
+        selection=selection,
+        **filters,
+    ).df()
+
+
+def sales_by_category(path: str, selection: Filters | None = None, **filters) -> pd.DataFrame:
+    return _query(
+        path,
+        "category, SUM(total_price) AS total_price",
+        "GROUP BY category ORDER BY category",
+        selection=selection,
+        **filters,
+    ).df()
+
+
+def sales_over_time(path: str, selection: Filters | None = None, **filters) -> pd.DataFrame:
+    return _query(
+        path,
+        "CAST(date AS TIMESTAMP) AS date, SUM(total_price) AS total_price",
+        "GROUP BY 1 ORDER BY 1",
+        selection=selection,
+        **filters,
+    ).df()
+
+
+def daily_totals(path: str) -> tuple[pd.DataFrame, bool]:
+    """Measures per day × category × region, and whether the dates carry no time."""
+    daily = _query(
+        path,
+        "CAST(date AS DATE) AS date, category, region, SUM(total_price) AS total_price, "
+        "SUM(quantity) AS quantity, COUNT(*) AS orders, "
+        "BOOL_AND(CAST(date AS TIMESTAMP) = CAST(CAST(date AS DATE) AS TIMESTAMP)) AS day_granular",
+        "GROUP BY 1, 2, 3",
+    ).df()
+    return daily, bool(daily.pop("day_granular").all())
+
+
+def customer_counts(
+    path: str, column: str, selection: Filters | None = None, **filters
+) -> pd.DataFrame:
+    if column not in FILTER_COLUMNS:
+        raise ValueError(f"Colonne non supportée : {column}")
+    return _query(
+        path,
+        f"{column}, COUNT(*) AS count",
+        f"GROUP BY {column} ORDER BY count DESC",
+        selection=selection,
+        **filters,
+    ).df()
+
+
+def distinct_values(path: str, column: str, selection: Filters | None = None) -> list:
+    if column not in FILTER_COLUMNS:
+        raise ValueError(f"Colonne non supportée : {column}")
+    rows = _query(path, f"DISTINCT {column}", f"ORDER BY {column}", selection).fetchall()
+    return [row[0] for row in rows]
+
+
+def order_count(path: str, selection: Filters | None = None, **filters) -> int:
+    return int(_query(path, "COUNT(*)", selection=selection, **filters).fetchone()[0])
@@ -0,0 +1,87 @@
+"""Bounded LRU cache of serialized Plotly figures.
+
+Keys combine the dataset version, the chart id and the filter parameters.
+Concurrent sessions asking for the same missing figure wait for a single
+build instead of each rebuilding it.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import TYPE_CHECKING
+
+import streamlit as st
+
+from utils.instrumentation import increment, span
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+MAX_FIGURES = int(os.environ.get("DASHBOARD_FIGURE_CACHE_SIZE", 128))
+
+
+class FigureCache:
+    """Thread-safe LRU cache storing figures as Plotly JSON."""
+
+    def __init__(self, max_size: int = MAX_FIGURES):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[Hashable, str] = OrderedDict()
+        self._building: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Hashable) -> str | None:
+        with self._lock:
+            payload = self._items.get(key)
+            if payload is not None:
+                self._items.move_to_end(key)
+            return payload
+
+    def get_or_build(self, key: Hashable, build: Callable[[], go.Figure]) -> go.Figure:
+        import plotly.io as pio
+
+        increment("cache.figures.lookups")
+        payload = self._lookup(key)
+        if payload is None:
+            with self._lock:
+                key_lock = self._building.setdefault(key, threading.Lock())
+            with key_lock:
+                # Un autre thread a pu construire la figure pendant l'attente
+                payload = self._lookup(key)
+                if payload is None:
+                    increment("cache.figures.misses")
+                    try:
+                        with span("figure.build"):
+                            payload = build().to_json()
+                        with self._lock:
+                            self.misses += 1
+                            self._items[key] = payload
+                            while len(self._items) > self.max_size:
+                                self._items.popitem(last=False)
+                    finally:
+                        # Verrou de construction libéré même si build() échoue
+                        with self._lock:
+                            self._building.pop(key, None)
+                    return pio.from_json(payload)
+        with self._lock:
+            self.hits += 1
+        return pio.from_json(payload)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._building.clear()
+
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    """Figure cache shared by every session of the server process."""
+    return FigureCache()
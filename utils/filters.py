@@ -0,0 +1,264 @@
+"""Global filters shared by every page, evaluated with bitmap indexes.
+
+The filter state (date range, regions, categories, products, age bands,
+genders) lives in ``st.session_state`` and follows the user from page to page.
+The widget options, date bounds and match count come from the configured
+aggregation backend, so the sidebar never loads the rows by itself.
+
+When the selection has to be made in memory (``FilteredBackend``), each
+dimension value has a precomputed bitmap (one bit per row, packed with
+``np.packbits``), so a combined filter is an OR within a dimension and an AND
+across dimensions over ``n_rows / 8`` bytes instead of boolean scans of the
+DataFrame. Date ranges use the rows sorted by date (two binary searches).
+"""
+
+import dataclasses
+import datetime
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+import streamlit as st
+
+from utils.data_loader import dataset_version, load_data
+from utils.incremental import IncrementalStore
+from utils.instrumentation import cache_lookup, cache_miss, timed
+
+BITMAP_COLUMNS = ("region", "category", "product", "customer_gender")
+# Tranches d'âge proposées dans le filtre (bornes incluses)
+AGE_BANDS = {
+    "18-24": (18, 24),
+    "25-34": (25, 34),
+    "35-44": (35, 44),
+    "45-54": (45, 54),
+    "55-64": (55, 64),
+    "65+": (65, 200),
+}
+STATE_KEY = "global_filters"
+
+
+@dataclasses.dataclass(frozen=True)
+class Filters:
+    """Selected values per dimension; an empty tuple means no restriction."""
+
+    start: datetime.date | None = None
+    end: datetime.date | None = None
+    regions: tuple = ()
+    categories: tuple = ()
+    products: tuple = ()
+    age_bands: tuple = ()
+    genders: tuple = ()
+
+    def active(self) -> bool:
+        return self != Filters()
+
+
+# Champ de Filters → colonne indexée
+FIELD_COLUMNS = {
+    "regions": "region",
+    "categories": "category",
+    "products": "product",
+    "genders": "customer_gender",
+}
+
+
+class BitmapIndex:
+    """Packed row bitmaps per dimension value and rows ordered by date."""
+
+    def __init__(self, df: pd.DataFrame, columns: tuple[str, ...] = BITMAP_COLUMNS):
+        self.n_rows = len(df)
+        self.bitmaps: dict[str, dict] = {}
+        for column in columns:
+            values = df[column].astype("category")
+            codes = values.cat.codes.to_numpy()
+            self.bitmaps[column] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(values.cat.categories)
+            }
+        ages = df["customer_age"].to_numpy()
+        self.bitmaps["age_band"] = {
+            band: np.packbits((ages >= low) & (ages <= high))
+            for band, (low, high) in AGE_BANDS.items()
+        }
+        days = df["date"].to_numpy().astype("datetime64[D]")
+        self.date_order = np.argsort(days, kind="stable")
+        self.sorted_days = days[self.date_order]
+
+    def values(self, column: str) -> list:
+        return sorted(self.bitmaps[column])
+
+    def date_bounds(self) -> tuple[datetime.date, datetime.date] | None:
+        if not self.n_rows:
+            return None
+        return self.sorted_days[0].item(), self.sorted_days[-1].item()
+
+    def _union(self, column: str, values) -> np.ndarray:
+        empty = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        bitmaps = [self.bitmaps[column].get(value, empty) for value in values]
+        return reduce(np.bitwise_or, bitmaps, empty)
+
+    def _date_range(self, start, end) -> np.ndarray:
+        low = 0 if start is None else np.searchsorted(self.sorted_days, np.datetime64(start, "D"))
+        high = (
+            self.n_rows
+            if end is None
+            else np.searchsorted(self.sorted_days, np.datetime64(end, "D"), side="right")
+        )
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[self.date_order[low:high]] = True
+        return np.packbits(selected)
+
+    def mask(self, filters: Filters, **equals) -> np.ndarray | None:
+        """Boolean row mask for ``filters`` (and equality filters), None if unrestricted."""
+        parts = []
+        if filters.start is not None or filters.end is not None:
+            parts.append(self._date_range(filters.start, filters.end))
+        for field, column in FIELD_COLUMNS.items():
+            if getattr(filters, field):
+                parts.append(self._union(column, getattr(filters, field)))
+        if filters.age_bands:
+            parts.append(self._union("age_band", filters.age_bands))
+        for column, value in equals.items():
+            if value is not None:
+                parts.append(self._union(column, [value]))
+        if not parts:
+            return None
+        packed = reduce(np.bitwise_and, parts)
+        return np.unpackbits(packed, count=self.n_rows).astype(bool)
+
+    @timed("filters.positions")
+    def positions(self, filters: Filters, **equals) -> np.ndarray | None:
+        mask = self.mask(filters, **equals)
+        return None if mask is None else np.flatnonzero(mask)
+
+
+@st.cache_resource(max_entries=4)
+@cache_miss("filter_index")
+def _load_index(
+    path: str, version: str, source: str, _df: pd.DataFrame | None = None
+) -> BitmapIndex:
+    return BitmapIndex(load_data(path) if _df is None else _df)
+
+
+@cache_lookup("filter_index")
+def load_filter_index(path: str, store: IncrementalStore | None = None) -> BitmapIndex:
+    """Bitmap index of ``path``, built once per dataset version.
+
+    With an incremental ``store`` the index covers the rows of ``store.df``
+    and is rebuilt when the store ingests new rows.
+    """
+    if store is not None:
+        return _load_index(path, store.version, "incremental", store.df)
+    return _load_index(path, dataset_version(path), "snapshot")
+
+
+@st.cache_data
+@cache_miss("filter_options")
+def _load_options(path: str, version: str) -> dict:
+    # Import différé : utils.aggregations dépend de ce module
+    from utils.aggregations import BACKEND, BACKENDS
+
+    backend = BACKENDS[BACKEND](path)
+    dates = pd.to_datetime(backend.sales_over_time()["date"])
+    genders = backend.customer_counts("customer_gender")["customer_gender"]
+    return {
+        "region": backend.distinct_values("region"),
+        "category": backend.distinct_values("category"),
+        "product": backend.distinct_values("product"),
+        "customer_gender": sorted(genders),
+        "bounds": (dates.min().date(), dates.max().date()) if len(dates) else None,
+        "orders": backend.order_count(),
+    }
+
+
+@cache_lookup("filter_options")
+def load_filter_options(path: str) -> dict:
+    """Widget values, date bounds and order count of ``path``, from the configured backend."""
+    return _load_options(path, dataset_version(path))
+
+
+@st.cache_data
+def _match_count(path: str, version: str, filters: Filters) -> int:
+    from utils.aggregations import get_backend
+
+    return get_backend(path, filters=filters).order_count()
+
+
+def get_filters() -> Filters:
+    """Filters selected in the current session."""
+    return st.session_state.get(STATE_KEY, Filters())
+
+
+def _store(field: str) -> None:
+    value = st.session_state[f"_filter_{field}"]
+    if field == "dates":
+        if len(value) != 2:
+            return  # sélection de plage en cours
+        changes = {"start": value[0], "end": value[1]}
+    else:
+        changes = {field: tuple(value)}
+    st.session_state[STATE_KEY] = dataclasses.replace(get_filters(), **changes)
+
+
+def _clamp(day: datetime.date | None, bounds: tuple) -> datetime.date | None:
+    return None if day is None else min(max(day, bounds[0]), bounds[1])
+
+
+def _reset() -> None:
+    st.session_state[STATE_KEY] = Filters()
+    for key in [key for key in st.session_state if str(key).startswith("_filter_")]:
+        del st.session_state[key]
+
+
+def filter_sidebar(path: str) -> Filters:
+    """Render the global filter widgets in the sidebar and return the selection.
+
+    Stops the page when no order matches the filters.
+    """
+    options = load_filter_options(path)
+    filters = get_filters()
+    bounds = options["bounds"]
+    sidebar = st.sidebar
+    sidebar.header("🔎 Filtres")
+
+    # Les clés des widgets sont perdues sur les pages sans filtres : restaurées depuis STATE_KEY
+    if bounds:
+        # Plage enregistrée hors des bornes actuelles (données changées) : ramenée dedans
+        clamped = dataclasses.replace(
+            filters, start=_clamp(filters.start, bounds), end=_clamp(filters.end, bounds)
+        )
+        if clamped != filters:
+            st.session_state[STATE_KEY] = filters = clamped
+        stored = st.session_state.get(
+            "_filter_dates", (filters.start or bounds[0], filters.end or bounds[1])
+        )
+        st.session_state["_filter_dates"] = tuple(_clamp(day, bounds) for day in stored)
+        sidebar.date_input(
+            "Période",
+            min_value=bounds[0],
+            max_value=bounds[1],
+            key="_filter_dates",
+            on_change=_store,
+            args=("dates",),
+        )
+    widgets = (
+        ("regions", "Régions", options["region"]),
+        ("categories", "Catégories", options["category"]),
+        ("products", "Produits", options["product"]),
+        ("age_bands", "Tranches d'âge", list(AGE_BANDS)),
+        ("genders", "Genre", options["customer_gender"]),
+    )
+    for field, label, values in widgets:
+        st.session_state.setdefault(f"_filter_{field}", list(getattr(filters, field)))
+        sidebar.multiselect(label, values, key=f"_filter_{field}", on_change=_store, args=(field,))
+    sidebar.button("Réinitialiser les filtres", on_click=_reset)
+
+    filters = get_filters()
+    if filters.active():
+        matches = _match_count(path, dataset_version(path), filters)
+        sidebar.caption(f"{matches:,} commandes sur {options['orders']:,}".replace(",", " "))
+        if not matches:
+            st.info("Aucune vente ne correspond aux filtres sélectionnés.")
+            st.stop()
+    return filters
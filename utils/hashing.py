@@ -0,0 +1,266 @@
+"""Password hashing: versioned format, calibration and worker pool.
+
+Hashes are stored as self-describing strings (``$pbkdf2-sha256$i=...$salt$hash``
+or argon2's ``$argon2id$v=19$m=...,t=...,p=...$...``), so the algorithm and its
+parameters can change per deployment: ``python -m utils.hashing calibrate``
+writes the parameters matching a target latency, and stored hashes using older
+parameters are upgraded at the next successful login (``needs_rehash``).
+
+PBKDF2 and argon2 release the GIL, so a small thread pool runs hashes in
+parallel while bounding how many CPU-heavy hashes run at once. Requests beyond
+``HASH_QUEUE_LIMIT`` are rejected immediately, and each email is limited to
+``LOGIN_RATE_LIMIT`` attempts per ``LOGIN_RATE_WINDOW`` seconds. The pool
+counters are exported as ``hashing.*`` through ``utils.instrumentation``.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from pathlib import Path
+
+import streamlit as st
+
+from utils.instrumentation import increment, span
+
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_QUEUE_LIMIT = int(os.environ.get("HASH_QUEUE_LIMIT", 32))
+HASH_TIMEOUT = float(os.environ.get("HASH_TIMEOUT", 30))
+LOGIN_RATE_LIMIT = int(os.environ.get("LOGIN_RATE_LIMIT", 5))
+LOGIN_RATE_WINDOW = float(os.environ.get("LOGIN_RATE_WINDOW", 60))
+
+# Paramètres de hachage de l'hôte (écrits par la commande de calibration)
+PARAMS_FILE = Path(
+    os.environ.get(
+        "HASH_PARAMS_FILE",
+        Path(__file__).resolve().parents[1] / "data" / "hash_params.json",
+    )
+)
+DEFAULT_PARAMS = {"scheme": "pbkdf2-sha256", "iterations": 200_000}
+# Ancien format : hash hex + sel dans une colonne séparée, 200 000 itérations
+LEGACY_ITERATIONS = 200_000
+MIN_PBKDF2_ITERATIONS = 100_000
+SALT_BYTES = 16
+
+
+class HashingRejected(Exception):
+    """Raised when a hash request is refused (queue full or rate limited)."""
+
+
+class HashingPool:
+    """Bounded worker pool for password hashing, with per-email rate limit."""
+
+    def __init__(
+        self,
+        workers: int = HASH_WORKERS,
+        queue_limit: int = HASH_QUEUE_LIMIT,
+        rate_limit: int = LOGIN_RATE_LIMIT,
+        rate_window: float = LOGIN_RATE_WINDOW,
+    ):
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash")
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self._attempts: dict[str, deque] = {}
+        self._swept = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected_busy": 0,
+            "timed_out": 0,
+            "rate_limited": 0,
+            "in_flight": 0,
+            "hash_seconds": 0.0,
+        }
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.stats[name] += value
+        if name != "hash_seconds":
+            increment(f"hashing.{name}", value)
+
+    def _sweep(self, now: float) -> None:
+        # Oublie les emails sans tentative dans la fenêtre (appelé sous le verrou)
+        stale = [key for key, attempts in self._attempts.items() if now - attempts[-1] > self.rate_window]
+        for key in stale:
+            del self._attempts[key]
+        self._swept = now
+
+    def check_rate(self, key: str) -> None:
+        """Record an attempt for ``key`` and refuse it above the limit."""
+        now = time.monotonic()
+        limited = False
+        with self._lock:
+            if now - self._swept > self.rate_window:
+                self._sweep(now)
+            attempts = self._attempts.setdefault(key, deque())
+            while attempts and now - attempts[0] > self.rate_window:
+                attempts.popleft()
+            if len(attempts) >= self.rate_limit:
+                limited = True
+            else:
+                attempts.append(now)
+        if limited:
+            self._count("rate_limited")
+            raise HashingRejected("Trop de tentatives, réessaie dans une minute.")
+
+    def _release(self, future: futures.Future) -> None:
+        self._count("in_flight", -1)
+        self._slots.release()
+
+    def run(self, fn, *args):
+        """Run ``fn(*args)`` in the pool and wait for its result.
+
+        Raises ``HashingRejected`` when the pool is full or the hash does not
+        finish within ``HASH_TIMEOUT`` seconds.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected_busy")
+            raise HashingRejected("Serveur occupé, réessaie dans quelques secondes.")
+        self._count("submitted")
+        self._count("in_flight")
+        started = time.perf_counter()
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            self._release(None)
+            raise
+        # Le créneau n'est rendu qu'à la fin réelle du hash, même après un timeout
+        future.add_done_callback(self._release)
+        try:
+            with span("hashing.run"):
+                result = future.result(timeout=HASH_TIMEOUT)
+        except futures.TimeoutError:
+            # Encore en file : retiré sans être exécuté (le callback libère le créneau)
+            future.cancel()
+            self._count("timed_out")
+            raise HashingRejected("Serveur occupé, réessaie dans quelques secondes.") from None
+        self._count("hash_seconds", time.perf_counter() - started)
+        self._count("completed")
+        return result
+
+
+@st.cache_resource
+def get_hashing_pool() -> HashingPool:
+    """Hashing pool shared by every session of the server process."""
+    return HashingPool()
+
+
+# ============================================================
+#                 FORMAT VERSIONNÉ DES HASH
+# ============================================================
+def load_params() -> dict:
+    """Hashing parameters of this host (calibrated file or defaults)."""
+    try:
+        return json.loads(PARAMS_FILE.read_text())
+    except (OSError, ValueError):
+        return dict(DEFAULT_PARAMS)
+
+
+def _argon2_hasher(params: dict | None = None):
+    from argon2 import PasswordHasher
+
+    if not params:
+        return PasswordHasher()
+    return PasswordHasher(
+        time_cost=params["time_cost"],
+        memory_cost=params["memory_cost"],
+        parallelism=params["parallelism"],
+    )
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> str:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations).hex()
+
+
+def hash_password(password: str, params: dict | None = None) -> str:
+    """Hash ``password`` with the current parameters (in the pool)."""
+    params = params or load_params()
+    pool = get_hashing_pool()
+    if params["scheme"] == "argon2id":
+        return pool.run(_argon2_hasher(params).hash, password)
+    salt = os.urandom(SALT_BYTES)
+    digest = pool.run(_pbkdf2, password, salt, params["iterations"])
+    return f"$pbkdf2-sha256$i={params['iterations']}${salt.hex()}${digest}"
+
+
+def verify_password(stored: str, password: str, legacy_salt: str | None = None) -> bool:
+    """Check ``password`` against a versioned (or legacy hex) hash."""
+    pool = get_hashing_pool()
+    if stored.startswith("$argon2"):
+        from argon2.exceptions import InvalidHashError, VerificationError
+
+        try:
+            return pool.run(_argon2_hasher().verify, stored, password)
+        except (InvalidHashError, VerificationError):
+            return False
+    if stored.startswith("$pbkdf2-sha256$"):
+        _, _, cost, salt_hex, digest = stored.split("$")
+        iterations = int(cost.removeprefix("i="))
+    else:
+        iterations, salt_hex, digest = LEGACY_ITERATIONS, legacy_salt or "", stored
+    candidate = pool.run(_pbkdf2, password, bytes.fromhex(salt_hex), iterations)
+    return secrets.compare_digest(candidate, digest)
+
+
+def needs_rehash(stored: str) -> bool:
+    """True if ``stored`` does not use the current scheme and parameters."""
+    params = load_params()
+    if params["scheme"] == "argon2id":
+        return not stored.startswith("$argon2id$") or _argon2_hasher(
+            params
+        ).check_needs_rehash(stored)
+    return not stored.startswith(f"$pbkdf2-sha256$i={params['iterations']}$")
+
+
+# ============================================================
+#                       CALIBRATION
+# ============================================================
+def _timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def calibrate(target_ms: float, scheme: str = "argon2id") -> dict:
+    """Parameters whose hashing time on this host is close to ``target_ms``."""
+    target = target_ms / 1000
+    if scheme == "pbkdf2-sha256":
+        probe = 50_000
+        elapsed = min(_timed(_pbkdf2, "calibration", b"0" * SALT_BYTES, probe) for _ in range(3))
+        iterations = int(probe * target / elapsed) // 1000 * 1000
+        return {"scheme": scheme, "iterations": max(iterations, MIN_PBKDF2_ITERATIONS)}
+
+    params = {"scheme": "argon2id", "time_cost": 1, "memory_cost": 65536, "parallelism": 1}
+    # Réduit la mémoire (minimum 19 Mio) si une seule passe dépasse déjà la cible
+    while params["memory_cost"] > 19456 and _timed(
+        _argon2_hasher(params).hash, "calibration"
+    ) > target:
+        params["memory_cost"] = max(params["memory_cost"] // 2, 19456)
+    while _timed(_argon2_hasher(params).hash, "calibration") < target:
+        params["time_cost"] += 1
+    return params
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibration du hachage des mots de passe.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cal = sub.add_parser("calibrate", help="choisit les paramètres pour une latence cible")
+    cal.add_argument("--target-ms", type=float, default=250)
+    cal.add_argument("--scheme", choices=["argon2id", "pbkdf2-sha256"], default="argon2id")
+    args = parser.parse_args()
+
+    params = calibrate(args.target_ms, args.scheme)
+    PARAMS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    PARAMS_FILE.write_text(json.dumps(params, indent=2))
+    print(f"Paramètres écrits dans {PARAMS_FILE} : {params}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Incremental ingestion of a sales CSV that only grows by appended rows.
+
+The store remembers the byte offset of the last complete line it parsed.
+On refresh only the appended bytes are parsed, compacted like the base frame
+and merged into the frame and into the rollup cube; a rewritten or truncated
+file triggers a full reload. A last line without newline may still be being
+written: it is only ingested once the file has been idle for
+``IDLE_SECONDS``, and a later append must then start with the missing newline.
+"""
+
+import io
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import streamlit as st
+
+from utils.cube import build_cube, merge_cubes
+from utils.data_loader import CATEGORY_COLUMNS, compact_frame
+
+# Octets conservés avant l'offset pour détecter une réécriture du fichier
+TAIL_BYTES = 64
+# Délai sans écriture après lequel une dernière ligne sans saut de ligne est ingérée
+IDLE_SECONDS = 2.0
+
+
+def concat_frames(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compacted frames, keeping the category columns categorical."""
+    chunks = [chunk for chunk in chunks if len(chunk)] or chunks[:1]
+    if len(chunks) == 1:
+        return chunks[0]
+    aligned = [chunk.copy(deep=False) for chunk in chunks]
+    for column in CATEGORY_COLUMNS:
+        # Catégories communes : pd.concat garde alors le dtype category
+        categories = chunks[0][column].cat.categories
+        for chunk in chunks[1:]:
+            categories = categories.union(chunk[column].cat.categories)
+        for chunk in aligned:
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(aligned, ignore_index=True)
+
+
+class IncrementalStore:
+    """Sales frame and rollup cube kept up to date with appended rows."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.cube = None
+        self.offset = 0
+        self._chunks: list[pd.DataFrame] = []
+        self._header = b""
+        self._tail = b""
+        self._stat = None
+        # Dernière ligne ingérée sans saut de ligne (fichier inactif)
+        self._unterminated = False
+        self._lock = threading.Lock()
+
+    @property
+    def df(self) -> pd.DataFrame:
+        # Les deltas sont concaténés à la demande (une seule copie)
+        chunks = self._chunks
+        if len(chunks) > 1:
+            chunks = [concat_frames(chunks)]
+            self._chunks = chunks
+        return chunks[0]
+
+    @property
+    def version(self) -> str:
+        """Version tag of the ingested content (file mtime/size and offset)."""
+        mtime_ns, size = self._stat or (0, 0)
+        return f"{mtime_ns}-{size}-{self.offset}"
+
+    def _parse(self, data: bytes) -> pd.DataFrame:
+        df: pd.DataFrame = pd.read_csv(io.BytesIO(self._header + data), parse_dates=["date"])
+        df["total_price"] = df["unit_price"] * df["quantity"]
+        return compact_frame(df)
+
+    def _advance(self, data: bytes) -> None:
+        self.offset += len(data)
+        self._tail = (self._tail + data)[-TAIL_BYTES:]
+
+    def _consume(self, data: bytes, flush: bool = False) -> pd.DataFrame | None:
+        if self._unterminated and data.startswith(b"\n"):
+            # Saut de ligne manquant de la ligne déjà ingérée
+            self._advance(data[:1])
+            data = data[1:]
+            self._unterminated = False
+        # On ne parse que jusqu'à la dernière ligne complète, sauf fichier inactif
+        end = data.rfind(b"\n") + 1
+        if flush and end < len(data):
+            self._unterminated = bool(data[end:].strip())
+            end = len(data)
+        if not data[:end].strip():
+            self._advance(data[:end])
+            return None
+        delta = self._parse(data[:end] if data[end - 1 : end] == b"\n" else data[:end] + b"\n")
+        self._advance(data[:end])
+        return delta
+
+    def _full_reload(self, flush: bool) -> None:
+        data = self.path.read_bytes()
+        header_end = data.find(b"\n") + 1
+        self._header = data[:header_end]
+        self.offset = header_end
+        self._tail = self._header[-TAIL_BYTES:]
+        self._unterminated = False
+        df = self._consume(data[header_end:], flush)
+        if df is None:
+            df = self._parse(b"")
+        self._chunks = [df]
+        self.cube = build_cube(df)
+
+    def _is_append(self, f, size: int) -> bool:
+        if size < self.offset:
+            return False
+        if f.read(len(self._header)) != self._header:
+            return False
+        f.seek(self.offset - len(self._tail))
+        if f.read(len(self._tail)) != self._tail:
+            return False
+        # Ligne ingérée sans saut de ligne puis prolongée : contenu réécrit
+        return not (self._unterminated and size > self.offset and f.read(1) != b"\n")
+
+    def refresh(self) -> "IncrementalStore":
+        """Ingest rows appended since the last refresh."""
+        with self._lock:
+            stat = self.path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            flush = time.time() - stat.st_mtime >= IDLE_SECONDS
+            # Même signature : rien à faire, sauf ligne incomplète d'un fichier devenu inactif
+            if self._stat == signature and not (flush and self.offset < stat.st_size):
+                return self
+            if self.cube is None:
+                self._full_reload(flush)
+            else:
+                with open(self.path, "rb") as f:
+                    if not self._is_append(f, stat.st_size):
+                        self._full_reload(flush)
+                    else:
+                        f.seek(self.offset)
+                        delta = self._consume(f.read(stat.st_size - self.offset), flush)
+                        if delta is not None and not delta.empty:
+                            self._chunks = self._chunks + [delta]
+                            self.cube = merge_cubes(self.cube, build_cube(delta))
+            self._stat = signature
+        return self
+
+
+@st.cache_resource
+def get_store(path: str) -> IncrementalStore:
+    """One incremental store per source file and server process."""
+    return IncrementalStore(path)
@@ -0,0 +1,207 @@
+"""Lightweight timing spans and cache counters for the rerun hot path.
+
+Spans time a block (``with span("load_data"):``), cache counters split the
+lookups of a ``st.cache_*`` function into hits and misses, and page spans
+(``page.<name>``) time a whole page script; other modules publish plain
+counters (``hashing.*``). Everything is kept in one
+registry per server process, shown on the Performance page and exportable as
+Prometheus text or JSON lines. ``DASHBOARD_INSTRUMENTATION=0`` disables it.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from functools import wraps
+
+import streamlit as st
+
+ENABLED = os.environ.get("DASHBOARD_INSTRUMENTATION", "1") == "1"
+# Nombre de mesures conservées par span pour les percentiles
+MAX_SAMPLES = int(os.environ.get("DASHBOARD_INSTRUMENTATION_SAMPLES", 1000))
+PROMETHEUS_PREFIX = "dashboard"
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class Registry:
+    """Thread-safe store of span durations and counters."""
+
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = defaultdict(lambda: deque(maxlen=max_samples))
+        self._totals: dict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.counters: dict[str, int] = defaultdict(int)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[name].append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def spans(self) -> list[dict]:
+        """Count, total and percentiles (ms) of every span, slowest total first."""
+        with self._lock:
+            items = [(name, sorted(self._samples[name]), *self._totals[name]) for name in self._totals]
+        rows = [
+            {
+                "name": name,
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total / count * 1000, 3),
+                "p50_ms": round(_percentile(samples, 0.50) * 1000, 3),
+                "p95_ms": round(_percentile(samples, 0.95) * 1000, 3),
+                "max_ms": round(samples[-1] * 1000, 3),
+            }
+            for name, samples, count, total in items
+        ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def caches(self) -> list[dict]:
+        """Lookups, hits, misses and hit ratio of every tracked cache."""
+        with self._lock:
+            counters = dict(self.counters)
+        names = sorted({key.split(".")[1] for key in counters if key.startswith("cache.")})
+        rows = []
+        for name in names:
+            lookups = counters.get(f"cache.{name}.lookups", 0)
+            misses = counters.get(f"cache.{name}.misses", 0)
+            hits = max(lookups - misses, 0)
+            rows.append(
+                {
+                    "cache": name,
+                    "lookups": lookups,
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": round(hits / lookups, 3) if lookups else None,
+                }
+            )
+        return rows
+
+    def counts(self) -> list[dict]:
+        """Value of every counter that is not a cache lookup/miss."""
+        with self._lock:
+            counters = dict(self.counters)
+        return [
+            {"name": name, "value": value}
+            for name, value in sorted(counters.items())
+            if not name.startswith("cache.")
+        ]
+
+    def to_prometheus(self) -> str:
+        """Text exposition format (spans as summaries, caches and counters as counters)."""
+        p = PROMETHEUS_PREFIX
+        lines = [f"# TYPE {p}_span_seconds summary"]
+        for row in self.spans():
+            label = f'span="{row["name"]}"'
+            for q, key in ((0.5, "p50_ms"), (0.95, "p95_ms")):
+                lines.append(f'{p}_span_seconds{{{label},quantile="{q}"}} {row[key] / 1000:.6f}')
+            lines.append(f"{p}_span_seconds_sum{{{label}}} {row['total_ms'] / 1000:.6f}")
+            lines.append(f"{p}_span_seconds_count{{{label}}} {row['count']}")
+        for kind in ("lookups", "misses"):
+            lines.append(f"# TYPE {p}_cache_{kind}_total counter")
+            for row in self.caches():
+                lines.append(f'{p}_cache_{kind}_total{{cache="{row["cache"]}"}} {row[kind]}')
+        # Certains compteurs descendent (in_flight) : exposés sans type
+        lines.append(f"# TYPE {p}_counter untyped")
+        for row in self.counts():
+            lines.append(f'{p}_counter{{name="{row["name"]}"}} {row["value"]}')
+        return "\n".join(lines) + "\n"
+
+    def to_jsonl(self) -> str:
+        """One JSON object per span, cache and counter, stamped with the export time."""
+        now = time.time()
+        records = [{"ts": now, "type": "span", **row} for row in self.spans()]
+        records += [{"ts": now, "type": "cache", **row} for row in self.caches()]
+        records += [{"ts": now, "type": "counter", **row} for row in self.counts()]
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self.counters.clear()
+
+
+@st.cache_resource
+def get_registry() -> Registry:
+    """Registry shared by every session of the server process."""
+    return Registry()
+
+
+class Span:
+    """Timer usable as a context manager or started/ended explicitly."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._started = time.perf_counter()
+
+    def __enter__(self) -> "Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.end()
+
+    def end(self) -> None:
+        if ENABLED:
+            get_registry().observe(self.name, time.perf_counter() - self._started)
+
+
+def span(name: str) -> Span:
+    return Span(name)
+
+
+def timed(name: str):
+    """Decorator recording every call of the function as span ``name``."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def increment(name: str, value: int = 1) -> None:
+    if ENABLED:
+        get_registry().increment(name, value)
+
+
+def cache_lookup(name: str):
+    """Decorator for the public accessor of a cache: counts every lookup."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            increment(f"cache.{name}.lookups")
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def cache_miss(name: str):
+    """Decorator placed under ``st.cache_*``: the body only runs on a miss."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            increment(f"cache.{name}.misses")
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,187 @@
+"""KPI snapshot precomputed and refreshed in the background.
+
+A daemon thread recomputes the KPIs and chart aggregates of the unfiltered
+dataset when its version changes (checked every ``KPI_POLL_SECONDS``) or at
+least every ``KPI_REFRESH_SECONDS``, then publishes the new
+:class:`KpiSnapshot` by replacing a single reference: readers see either the
+previous snapshot or the new one, never a mix. Pages read it through
+:class:`SnapshotBackend` (``DASHBOARD_KPI_SNAPSHOT=1``, default), so reading a
+KPI is a dictionary lookup whatever the data size or the number of sessions.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+import streamlit as st
+
+from utils.aggregations import BACKEND, BACKENDS, Backend
+from utils.data_loader import dataset_version
+from utils.date_index import DateIndex
+from utils.instrumentation import span
+
+KPI_POLL_SECONDS = float(os.environ.get("KPI_POLL_SECONDS", 5))
+KPI_REFRESH_SECONDS = float(os.environ.get("KPI_REFRESH_SECONDS", 300))
+# Nombre de produits conservés (top_products(n) servi pour n <= TOP_PRODUCTS)
+TOP_PRODUCTS = 10
+CUSTOMER_COLUMNS = ("customer_age", "customer_gender")
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def _key(name: str, *args, **filters) -> tuple:
+    return (name, args, tuple(sorted(filters.items())))
+
+
+class KpiSnapshot:
+    """Immutable set of precomputed results for one dataset version."""
+
+    def __init__(self, version: str, results: dict):
+        self.version = version
+        self.results = results
+        self.computed_at = time.time()
+
+    def get(self, name: str, *args, **filters):
+        """Stored result of ``name(*args, **filters)``, or ``MISSING``."""
+        result = self.results.get(_key(name, *args, **filters), MISSING)
+        # Copie : les pages peuvent renommer les colonnes du résultat
+        return result.copy() if isinstance(result, pd.DataFrame) else result
+
+
+def compute_snapshot(backend, version: str) -> KpiSnapshot:
+    """Evaluate every call the pages make without filters on ``backend``."""
+    results = {}
+
+    def put(name: str, *args, **filters):
+        results[_key(name, *args, **filters)] = getattr(backend, name)(*args, **filters)
+
+    put("total_revenue")
+    put("average_order_value")
+    put("top_products", TOP_PRODUCTS)
+    put("sales_by_category")
+    put("sales_over_time")
+    put("distinct_values", "region")
+    put("order_count")
+    # Graphique de la page Analyses : une entrée par région
+    for region in results[_key("distinct_values", "region")]:
+        put("sales_by_category", region=region)
+    for column in CUSTOMER_COLUMNS:
+        put("customer_counts", column)
+    return KpiSnapshot(version, results)
+
+
+class KpiPublisher:
+    """Keeps the latest snapshot of ``path`` and refreshes it on demand."""
+
+    def __init__(self, path: str, backend_name: str | None = None):
+        self.path = path
+        self.backend_name = (backend_name or BACKEND).lower()
+        self.current: KpiSnapshot | None = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        current = self.current
+        return (
+            current is None
+            or current.version != dataset_version(self.path)
+            or time.time() - current.computed_at > KPI_REFRESH_SECONDS
+        )
+
+    def refresh(self, force: bool = False) -> bool:
+        """Recompute and publish if the data changed; True if published."""
+        with self._lock:
+            if not force and not self.is_stale():
+                return False
+            version = dataset_version(self.path)
+            # Chronométré en bloc : les spans metrics.* ne comptent que les appels des pages
+            with span("kpi_snapshot.compute"):
+                snapshot = compute_snapshot(BACKENDS[self.backend_name](self.path), version)
+            # Publication atomique : une seule affectation de référence
+            self.current = snapshot
+            logger.info("Snapshot KPI publié pour %s (version %s)", self.path, version)
+            return True
+
+    def start(self, interval: float = KPI_POLL_SECONDS) -> threading.Event:
+        """Check for changes every ``interval`` seconds; set the event to stop."""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("Échec du calcul du snapshot KPI")
+
+        threading.Thread(target=loop, name="kpi-snapshot", daemon=True).start()
+        return stop
+
+
+@st.cache_resource
+def get_kpi_publisher(path: str) -> KpiPublisher:
+    """Publisher of ``path`` (one per process), with its refresh thread started."""
+    publisher = KpiPublisher(path)
+    publisher.refresh(force=True)
+    publisher.start()
+    return publisher
+
+
+class SnapshotBackend(Backend):
+    """Serves the published snapshot; other calls go to the live backend."""
+
+    def __init__(self, path: str, snapshot: KpiSnapshot):
+        super().__init__(path)
+        # Un seul snapshot par rerun : KPIs et graphiques cohérents entre eux
+        self.snapshot = snapshot
+        self._live = None
+
+    @property
+    def version(self) -> str:
+        return self.snapshot.version
+
+    @property
+    def live(self) -> Backend:
+        if self._live is None:
+            # Non instrumenté : l'appel est déjà chronométré sur ce backend
+            self._live = BACKENDS[BACKEND](self.path)
+        return self._live
+
+    def _get(self, name: str, *args, **filters):
+        filters = {k: v for k, v in filters.items() if v is not None}
+        result = self.snapshot.get(name, *args, **filters)
+        if result is MISSING:
+            return getattr(self.live, name)(*args, **filters)
+        return result
+
+    def total_revenue(self, **filters) -> float:
+        return self._get("total_revenue", **filters)
+
+    def average_order_value(self, **filters) -> float:
+        return self._get("average_order_value", **filters)
+
+    def top_products(self, n: int = 5, **filters) -> pd.DataFrame:
+        if n <= TOP_PRODUCTS and not any(v is not None for v in filters.values()):
+            return self._get("top_products", TOP_PRODUCTS).head(n)
+        return self.live.top_products(n, **filters)
+
+    def sales_by_category(self, **filters) -> pd.DataFrame:
+        return self._get("sales_by_category", **filters)
+
+    def sales_over_time(self, **filters) -> pd.DataFrame:
+        return self._get("sales_over_time", **filters)
+
+    def customer_counts(self, column: str) -> pd.DataFrame:
+        return self._get("customer_counts", column)
+
+    def distinct_values(self, column: str) -> list:
+        return self._get("distinct_values", column)
+
+    def order_count(self, **filters) -> int:
+        return self._get("order_count", **filters)
+
+    def date_index(self) -> DateIndex:
+        return self.live.date_index()
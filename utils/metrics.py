@@ -8,14 +8,27 @@ def total_revenue(df: pd.DataFrame) -> float:
 
 
 def average_order_value(df: pd.DataFrame) -> float:
-    return float(df["total_price"].mean())
+    # Sélection vide : 0.0 comme les backends cube et DuckDB (et non NaN)
+    return float(df["total_price"].mean()) if len(df) else 0.0
 
 
 def top_products(df: pd.DataFrame, n: int = 5) -> pd.DataFrame:
     return (
-        df.groupby("product")["total_price"]
+        df.groupby("product", observed=True)["total_price"]
         .sum()
         .sort_values(ascending=False)
         .head(n)
         .reset_index()
     )
+
+
+def sales_by_category(df: pd.DataFrame) -> pd.DataFrame:
+    return df.groupby("category", observed=True)["total_price"].sum().reset_index()
+
+
+def sales_over_time(df: pd.DataFrame) -> pd.DataFrame:
+    return df.groupby("date", observed=True)["total_price"].sum().reset_index()
+
+
+def customer_counts(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    return df[column].value_counts().reset_index()
@@ -0,0 +1,58 @@
+"""Partition index: row positions and category totals per dimension value.
+
+Built once per dataset version, it turns a region/category/product filter into
+a dictionary lookup instead of a boolean scan over every row.
+"""
+
+import numpy as np
+import pandas as pd
+
+import streamlit as st
+
+from utils.data_loader import dataset_version, load_data
+from utils.instrumentation import cache_lookup, cache_miss
+
+INDEXED_COLUMNS = ("region", "category", "product")
+
+
+class PartitionIndex:
+    """Row positions and per-value category totals for the indexed columns."""
+
+    def __init__(self, df: pd.DataFrame, columns: tuple[str, ...] = INDEXED_COLUMNS):
+        self.rows: dict[str, dict] = {}
+        self.category_totals: dict[str, dict] = {}
+        for column in columns:
+            groups = df.groupby(column, observed=True)
+            self.rows[column] = groups.indices
+            keys = [column] if column == "category" else [column, "category"]
+            totals = df.groupby(keys, observed=True)["total_price"].sum().reset_index()
+            self.category_totals[column] = {
+                value: part[["category", "total_price"]].reset_index(drop=True)
+                for value, part in totals.groupby(column, observed=True)
+            }
+
+    def positions(self, **filters) -> np.ndarray | None:
+        """Row positions matching every equality filter (None = no filter)."""
+        result = None
+        for column, value in filters.items():
+            if value is None:
+                continue
+            rows = self.rows[column].get(value, np.empty(0, dtype=np.intp))
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        return result
+
+    def sales_by_category(self, column: str, value) -> pd.DataFrame:
+        empty = pd.DataFrame({"category": [], "total_price": []})
+        return self.category_totals[column].get(value, empty)
+
+
+@st.cache_resource(max_entries=4)
+@cache_miss("partition_index")
+def _load_index(path: str, version: str) -> PartitionIndex:
+    return PartitionIndex(load_data(path))
+
+
+@cache_lookup("partition_index")
+def load_partition_index(path: str) -> PartitionIndex:
+    """Partition index of ``path``, built once per dataset version."""
+    return _load_index(path, dataset_version(path))
@@ -0,0 +1,161 @@
+"""Period-over-period KPIs computed from the daily prefix sums.
+
+Every metric here reads the cumulative arrays of ``utils.date_index``: deltas
+compare two ranges (four lookups), rolling windows and monthly series are
+array arithmetic over the calendar, and growth per category/region is one
+vectorized operation over the stacked slices. None of them depends on the
+number of orders once the index exists.
+"""
+
+import calendar
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.date_index import DateIndex
+from utils.filters import Filters
+
+ROLLING_WINDOWS = (7, 30)
+GROWTH_DAYS = 30
+
+REVENUE, QUANTITY, ORDERS = range(3)
+
+
+def shift_months(day: datetime.date, months: int) -> datetime.date:
+    """Same day ``months`` later (clipped to the month length)."""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    last = calendar.monthrange(year, month + 1)[1]
+    return datetime.date(year, month + 1, min(day.day, last))
+
+
+def _change(current: float, previous: float) -> float | None:
+    return (current - previous) / previous if previous else None
+
+
+def _aov(revenue: np.ndarray, orders: np.ndarray) -> np.ndarray:
+    return np.divide(revenue, orders, out=np.full(len(revenue), np.nan), where=orders > 0)
+
+
+def _restrict(values: list, selection) -> list:
+    # Une valeur, plusieurs valeurs ou rien (toutes)
+    if not selection:
+        return values
+    selected = {selection} if isinstance(selection, str) else set(selection)
+    return [v for v in values if v in selected]
+
+
+def last_day(index: DateIndex) -> datetime.date | None:
+    return index.calendar[-1].item() if index.n_days else None
+
+
+def rolling(index: DateIndex, window: int, category=None, region=None) -> pd.DataFrame:
+    """Revenue, orders and AOV over the ``window`` days ending on each day."""
+    cum = index.cumulative(category, region)
+    ends = np.arange(1, index.n_days + 1)
+    sums = cum[ends] - cum[np.maximum(ends - window, 0)]
+    return pd.DataFrame(
+        {
+            "date": pd.to_datetime(index.calendar),
+            "total_price": sums[:, REVENUE],
+            "orders": sums[:, ORDERS],
+            "average_order_value": _aov(sums[:, REVENUE], sums[:, ORDERS]),
+        }
+    )
+
+
+def monthly(index: DateIndex, category=None, region=None) -> pd.DataFrame:
+    """Monthly revenue, orders and AOV with month-over-month and year-over-year change."""
+    if not index.n_days:
+        return pd.DataFrame(columns=["month", "total_price", "orders", "average_order_value", "mom", "yoy"])
+    cum = index.cumulative(category, region)
+    months = index.calendar.astype("datetime64[M]")
+    # Calendrier continu : chaque mois est un bloc contigu de jours
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    bounds = np.r_[starts, index.n_days]
+    sums = cum[bounds[1:]] - cum[bounds[:-1]]
+    revenue = pd.Series(sums[:, REVENUE])
+    return pd.DataFrame(
+        {
+            "month": pd.to_datetime(months[starts]),
+            "total_price": revenue,
+            "orders": sums[:, ORDERS],
+            "average_order_value": _aov(sums[:, REVENUE], sums[:, ORDERS]),
+            "mom": revenue / revenue.shift(1).replace(0, np.nan) - 1,
+            "yoy": revenue / revenue.shift(12).replace(0, np.nan) - 1,
+        }
+    )
+
+
+def growth(
+    index: DateIndex,
+    dimension: str,
+    days: int = GROWTH_DAYS,
+    as_of: datetime.date | None = None,
+    category=None,
+    region=None,
+) -> pd.DataFrame:
+    """Revenue of the last ``days`` days vs the ``days`` before, per category or region.
+
+    ``category`` and ``region`` (one or several values) restrict both the
+    listed values and the other dimension, e.g. category growth within the
+    selected regions.
+    """
+    if dimension == "category":
+        values = _restrict(index.categories, category)
+        keys = [(v, region) for v in values]
+    else:
+        values = _restrict(index.regions, region)
+        keys = [(category, v) for v in values]
+    as_of = as_of or last_day(index)
+    if as_of is None or not values:
+        return pd.DataFrame(columns=[dimension, "current", "previous", "growth"])
+    stacked = np.stack([index.cumulative(*key)[:, REVENUE] for key in keys])
+    high = index.rows(end=as_of)[1]
+    mid, low = max(high - days, 0), max(high - 2 * days, 0)
+    current = stacked[:, high] - stacked[:, mid]
+    previous = stacked[:, mid] - stacked[:, low]
+    rates = np.divide(current - previous, previous, out=np.full(len(values), np.nan), where=previous > 0)
+    return (
+        pd.DataFrame({dimension: values, "current": current, "previous": previous, "growth": rates})
+        .sort_values("current", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def period_kpis(index: DateIndex, filters: Filters | None = None) -> dict | None:
+    """Month-to-date deltas (MoM, YoY) and rolling revenue/AOV at the selection end.
+
+    Uses the categories, regions and end date of ``filters``; returns None
+    when the filters restrict other dimensions (not covered by the index).
+    """
+    filters = filters or Filters()
+    if filters.products or filters.age_bands or filters.genders:
+        return None
+    as_of = last_day(index)
+    if as_of is None:
+        return None
+    if filters.end is not None:
+        as_of = min(as_of, filters.end)
+    slice_ = {"category": filters.categories, "region": filters.regions}
+
+    start = as_of.replace(day=1)
+    kpis = {"as_of": as_of, "month_to_date": index.totals(start, as_of, **slice_)["total_price"]}
+    for name, months in (("mom", 1), ("yoy", 12)):
+        reference = (shift_months(start, -months), shift_months(as_of, -months))
+        kpis[name] = index.compare((start, as_of), reference, **slice_)["change"]
+
+    for window in ROLLING_WINDOWS:
+        first = as_of - datetime.timedelta(days=window - 1)
+        current = index.totals(first, as_of, **slice_)
+        previous = index.totals(
+            first - datetime.timedelta(days=window), first - datetime.timedelta(days=1), **slice_
+        )
+        aov = current["total_price"] / current["orders"] if current["orders"] else None
+        kpis[f"rolling_{window}"] = {
+            "total_price": current["total_price"],
+            "average_order_value": aov,
+            "change": _change(current["total_price"], previous["total_price"]),
+        }
+    return kpis
@@ -0,0 +1,121 @@
+"""In-memory stand-in for the Supabase (PostgREST) client.
+
+Implements the subset of the query builder used by ``utils.auth_supabase``
+(select/insert/update/delete, eq/lt/gt/in_, order, limit, execute) so that the
+Supabase backend can run locally and in benchmarks without network access.
+Enabled with ``SUPABASE_LOCAL=1``.
+"""
+
+import copy
+import itertools
+import threading
+from collections import defaultdict
+
+
+class APIResponse:
+    def __init__(self, data: list[dict]):
+        self.data = data
+
+
+class QueryBuilder:
+    """Chainable query on one table of :class:`LocalSupabaseClient`."""
+
+    def __init__(self, client: "LocalSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._payload = None
+        self._filters = []
+        self._order = None
+        self._limit = None
+
+    # --- Actions ---
+    def select(self, columns: str = "*"):
+        self._action = "select"
+        self._payload = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, rows):
+        self._action = "insert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values: dict):
+        self._action = "update"
+        self._payload = values
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    # --- Filtres ---
+    def eq(self, column: str, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def lt(self, column: str, value):
+        self._filters.append(lambda row: row.get(column) is not None and row[column] < value)
+        return self
+
+    def gt(self, column: str, value):
+        self._filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def in_(self, column: str, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    # --- Exécution ---
+    def _matches(self, rows: list[dict]) -> list[dict]:
+        matched = [row for row in rows if all(f(row) for f in self._filters)]
+        if self._order:
+            column, desc = self._order
+            matched.sort(key=lambda row: row.get(column) or "", reverse=desc)
+        if self._limit is not None:
+            matched = matched[: self._limit]
+        return matched
+
+    def execute(self) -> APIResponse:
+        with self._client.lock:
+            rows = self._client.tables[self._table]
+            if self._action == "insert":
+                inserted = []
+                for row in self._payload:
+                    row = dict(row)
+                    row.setdefault("id", next(self._client.ids[self._table]))
+                    rows.append(row)
+                    inserted.append(row)
+                return APIResponse(copy.deepcopy(inserted))
+
+            matched = self._matches(rows)
+            if self._action == "update":
+                for row in matched:
+                    row.update(self._payload)
+            elif self._action == "delete":
+                ids = {id(row) for row in matched}
+                rows[:] = [row for row in rows if id(row) not in ids]
+            elif self._payload:
+                matched = [{k: row.get(k) for k in self._payload} for row in matched]
+            return APIResponse(copy.deepcopy(matched))
+
+
+class LocalSupabaseClient:
+    """Thread-safe in-memory tables exposing ``client.table(name)``."""
+
+    def __init__(self):
+        self.tables: dict[str, list[dict]] = defaultdict(list)
+        self.ids = defaultdict(lambda: itertools.count(1))
+        self.lock = threading.RLock()
+
+    def table(self, name: str) -> QueryBuilder:
+        return QueryBuilder(self, name)
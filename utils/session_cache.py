@@ -0,0 +1,80 @@
+"""In-process TTL cache of validated sessions.
+
+``require_login`` runs on every rerun; with this cache a token validated less
+than ``SESSION_CACHE_TTL`` seconds ago is checked locally instead of hitting
+the database (Supabase HTTP or DuckDB). ``delete_session`` invalidates the
+entry explicitly; other server processes see a deletion after the TTL at most.
+"""
+
+import datetime
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.instrumentation import increment
+
+SESSION_CACHE_TTL = float(os.environ.get("SESSION_CACHE_TTL", 60))
+SESSION_CACHE_SIZE = int(os.environ.get("SESSION_CACHE_SIZE", 10_000))
+
+
+def _expires_at(session: dict) -> datetime.datetime:
+    expires_at = session["expires_at"]
+    if isinstance(expires_at, str):
+        expires_at = datetime.datetime.fromisoformat(expires_at)
+    return expires_at
+
+
+class SessionCache:
+    """Bounded LRU of ``token -> session`` entries with a TTL."""
+
+    def __init__(self, ttl: float = SESSION_CACHE_TTL, max_size: int = SESSION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> dict | None:
+        increment("cache.sessions.lookups")
+        session = self._get(token)
+        if session is None:
+            increment("cache.sessions.misses")
+        return session
+
+    def _get(self, token: str) -> dict | None:
+        with self._lock:
+            entry = self._items.get(token)
+            if entry is None:
+                return None
+            session, cached_at = entry
+            if (
+                time.monotonic() - cached_at > self.ttl
+                or datetime.datetime.utcnow() > _expires_at(session)
+            ):
+                del self._items[token]
+                return None
+            self._items.move_to_end(token)
+            return session
+
+    def put(self, token: str, session: dict) -> None:
+        with self._lock:
+            self._items[token] = (session, time.monotonic())
+            self._items.move_to_end(token)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._items.pop(token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+@st.cache_resource
+def get_session_cache() -> SessionCache:
+    """Session cache shared by every Streamlit session of the process."""
+    return SessionCache()
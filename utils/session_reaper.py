@@ -0,0 +1,38 @@
+"""Background deletion of expired sessions.
+
+Each auth backend exposes ``purge_expired_sessions(batch_size)``; the reaper
+calls it periodically from a daemon thread so the sessions table stays small
+even for tokens that are never looked up again.
+"""
+
+import logging
+import os
+import threading
+from collections.abc import Callable
+
+REAPER_INTERVAL_SECONDS = float(os.environ.get("SESSION_REAPER_INTERVAL", 3600))
+REAPER_BATCH_SIZE = int(os.environ.get("SESSION_REAPER_BATCH_SIZE", 1000))
+
+logger = logging.getLogger(__name__)
+
+
+def start_reaper(
+    purge: Callable[[int], int],
+    interval: float = REAPER_INTERVAL_SECONDS,
+    batch_size: int = REAPER_BATCH_SIZE,
+) -> threading.Event:
+    """Run ``purge(batch_size)`` every ``interval`` seconds; set the event to stop."""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                deleted = purge(batch_size)
+                if deleted:
+                    logger.info("%d sessions expirées supprimées", deleted)
+            except Exception:
+                logger.exception("Échec de la purge des sessions expirées")
+            stop.wait(interval)
+
+    threading.Thread(target=loop, name="session-reaper", daemon=True).start()
+    return stop
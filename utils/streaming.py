@@ -0,0 +1,61 @@
+"""Out-of-core aggregation of oversized sales exports.
+
+The CSV is read in bounded chunks; each chunk is folded into the rollup cube
+(revenue, orders, per-category/day/product totals) and into the customer
+age/gender counts, then discarded. Peak memory depends on the chunk size and
+on the number of groups, not on the size of the file.
+"""
+
+import os
+from collections.abc import Iterator
+
+import pandas as pd
+
+import streamlit as st
+
+from utils.cube import build_cube, merge_cubes
+from utils.data_loader import dataset_version
+from utils.instrumentation import cache_lookup, cache_miss
+
+CHUNK_ROWS = int(os.environ.get("DASHBOARD_CHUNK_ROWS", 250_000))
+CUSTOMER_COLUMNS = ("customer_age", "customer_gender")
+
+
+def iter_chunks(path: str, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield the CSV in chunks of at most ``chunksize`` rows, with total price."""
+    with pd.read_csv(path, parse_dates=["date"], chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk["total_price"] = chunk["unit_price"] * chunk["quantity"]
+            yield chunk
+
+
+def stream_aggregates(path: str, chunksize: int = CHUNK_ROWS) -> dict:
+    """Fold every chunk of ``path`` into the cube and the customer counts."""
+    cube = None
+    counts = {column: pd.Series(dtype="int64") for column in CUSTOMER_COLUMNS}
+    for chunk in iter_chunks(path, chunksize):
+        partial = build_cube(chunk)
+        cube = partial if cube is None else merge_cubes(cube, partial)
+        for column in CUSTOMER_COLUMNS:
+            counts[column] = counts[column].add(chunk[column].value_counts(), fill_value=0)
+    if cube is None:
+        # Fichier sans lignes : cube vide, les métriques valent zéro
+        empty = pd.read_csv(path, nrows=0, parse_dates=["date"])
+        empty["total_price"] = empty["unit_price"] * empty["quantity"]
+        cube = build_cube(empty)
+    return {
+        "cube": cube,
+        "counts": {column: s.astype("int64") for column, s in counts.items()},
+    }
+
+
+@st.cache_data
+@cache_miss("aggregates")
+def _load_aggregates(path: str, version: str) -> dict:
+    return stream_aggregates(path)
+
+
+@cache_lookup("aggregates")
+def load_aggregates(path: str) -> dict:
+    """Streamed aggregates of ``path``, recomputed once per dataset version."""
+    return _load_aggregates(path, dataset_version(path))